@@ -1,6 +1,6 @@
 """
 Elevenlabs-ComfyUI: Complete ElevenLabs API Integration
-Professional-grade AI audio capabilities with 13 specialized nodes
+Professional-grade AI audio capabilities with 15 specialized nodes
 """
 
 from .nodes import NODE_CLASS_MAPPINGS, NODE_DISPLAY_NAME_MAPPINGS
@@ -0,0 +1 @@
+"""Benchmarks for ElevenLabs ComfyUI nodes (run against a local mock server)"""
@@ -0,0 +1,91 @@
+"""Shared helpers for benchmarks: package loading and a local mock ElevenLabs server"""
+
+import importlib.util
+import io
+import json
+import math
+import os
+import struct
+import sys
+import threading
+import time
+import wave
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_package(name="elevenlabs_comfyui"):
+    """Import the node package from this checkout (its folder name may not be importable)"""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(
+        name, os.path.join(REPO_ROOT, "__init__.py"), submodule_search_locations=[REPO_ROOT]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_wav(seconds=1.0, sample_rate=22050):
+    """Generate a mono 16-bit sine WAV file as bytes"""
+    frames = int(seconds * sample_rate)
+    pcm = b"".join(struct.pack("<h", int(8000 * math.sin(2 * math.pi * 220 * i / sample_rate)))
+                   for i in range(frames))
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm)
+    return buffer.getvalue()
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """Answers ElevenLabs endpoints after a fixed simulated latency"""
+    
+    protocol_version = "HTTP/1.1"
+    latency = 0.2
+    # Extra latency per uploaded megabyte, simulating processing time that grows with the audio
+    seconds_per_mb = 0.0
+    audio = None
+    
+    def log_message(self, *args):
+        pass
+    
+    def _send(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def do_GET(self):
+        time.sleep(self.latency)
+        self._send(json.dumps({"voices": [{"name": "Mock", "voice_id": "mock"}]}).encode(), "application/json")
+    
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        time.sleep(self.latency + len(body) / 1e6 * self.seconds_per_mb)
+        if self.path.startswith("/v1/speech-to-text"):
+            words = [{"text": "mock", "start": 0.0, "end": 0.4, "type": "word"}]
+            self._send(json.dumps({"text": "mock transcription", "words": words}).encode(), "application/json")
+        else:
+            self._send(self.audio, "audio/wav")
+
+
+def start_mock_server(latency=0.2, audio=None, seconds_per_mb=0.0):
+    """
+    Start a threaded mock server in the background
+    
+    Returns:
+        Tuple of (server, base_url)
+    """
+    handler = type("Handler", (MockHandler,), {"latency": latency, "audio": audio or make_wav(),
+                                               "seconds_per_mb": seconds_per_mb})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
@@ -0,0 +1,60 @@
+"""
+Wall-clock time of the Batch TTS node rendering N lines serially vs. concurrently
+
+Usage:
+    python benchmarks/batch_tts.py --lines 32 --concurrency 8 --latency 0.2
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks._common import load_package, start_mock_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.2, help="Simulated server latency in seconds")
+    args = parser.parse_args()
+    
+    # Keep the benchmark out of the user's cache directory (set before the package reads it)
+    cache_dir = tempfile.mkdtemp(prefix="elevenlabs-bench-")
+    os.environ["ELEVENLABS_CACHE_DIR"] = cache_dir
+    package = load_package()
+    api = sys.modules[f"{package.__name__}.utils.api"]
+    scheduler = sys.modules[f"{package.__name__}.utils.scheduler"].RequestScheduler
+    batch_tts = sys.modules[f"{package.__name__}.nodes.tts_batch"].ElevenLabsBatchTTS
+    
+    server, base_url = start_mock_server(latency=args.latency)
+    api.ElevenLabsClient.configure(base_url=base_url, pool_size=max(args.concurrency, 1))
+    scheduler.requests_per_second = 0
+    scheduler.default_concurrency = args.concurrency
+    
+    lines = "\n".join(f"Line {index + 1} from the benchmark" for index in range(args.lines))
+    timings = []
+    for parallel in (1, args.concurrency):
+        start = time.perf_counter()
+        _, lengths = batch_tts().generate_batch("benchmark-key", lines, "Mock (mock)", "eleven_turbo_v2_5",
+                                                0.5, 0.75, 0.0, True, output_format="pcm_22050",
+                                                max_parallel=parallel, use_cache=False)
+        timings.append(time.perf_counter() - start)
+        assert lengths != "[]", "every line failed"
+    server.shutdown()
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    
+    serial, concurrent = timings
+    print(f"\n{args.lines} lines, {args.latency * 1000:.0f} ms simulated latency")
+    print(f"  serial:          {serial:7.2f}s  {args.lines / serial:7.1f} lines/s")
+    print(f"  concurrent (x{args.concurrency}): {concurrent:7.2f}s  {args.lines / concurrent:7.1f} lines/s")
+    print(f"  speedup:         {serial / concurrent:7.1f}x")
+    print(f"  pool: {api.ElevenLabsClient.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
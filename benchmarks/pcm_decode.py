@@ -0,0 +1,63 @@
+"""
+Decode cost of the raw PCM fast path vs. the torchaudio container path
+
+Usage:
+    python benchmarks/pcm_decode.py --seconds 60 --repeat 20 [--mp3 sample.mp3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks._common import load_package, make_wav
+
+
+def measure(fn, repeat):
+    """Best-of-N wall time in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=60.0, help="Length of the test signal")
+    parser.add_argument("--sample-rate", type=int, default=24000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--mp3", help="Optional MP3 file to time the MP3 decode path")
+    args = parser.parse_args()
+    
+    package = load_package()
+    audio = sys.modules[f"{package.__name__}.utils.audio"]
+    
+    wav = make_wav(args.seconds, args.sample_rate)
+    pcm = wav[44:]
+    print(f"{args.seconds:.0f}s mono @ {args.sample_rate} Hz ({len(pcm) / 1e6:.1f} MB PCM), best of {args.repeat}")
+    
+    paths = [
+        ("raw PCM fast path", lambda: audio.load_audio_from_response(pcm, f"pcm_{args.sample_rate}")),
+        ("WAV via torchaudio", lambda: audio.load_audio_from_response(wav)),
+    ]
+    if args.mp3:
+        with open(args.mp3, "rb") as f:
+            mp3 = f.read()
+        paths.append(("MP3 via torchaudio", lambda: audio.load_audio_from_response(mp3)))
+    
+    baseline = None
+    for name, fn in paths:
+        try:
+            elapsed = measure(fn, args.repeat)
+        except Exception as e:
+            print(f"  {name:<20} unavailable ({type(e).__name__}: {str(e).splitlines()[0][:80]})")
+            continue
+        baseline = baseline or elapsed
+        print(f"  {name:<20} {elapsed:8.2f} ms  ({elapsed / baseline:5.1f}x fast path)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Wall-clock time of long-audio transcription vs. number of parallel segments
+
+The mock server's response time grows with the uploaded size, like real
+transcription, so splitting the audio and transcribing segments concurrently
+shows up as a speedup.
+
+Usage:
+    python benchmarks/segmented_stt.py --minutes 30 --segments 1 2 4 8 16
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks._common import load_package, start_mock_server
+
+
+SAMPLE_RATE = 16000
+
+
+def make_speech_like(minutes):
+    """Tone bursts separated by short pauses, so there are quiet points to cut at"""
+    seconds = int(minutes * 60)
+    t = torch.arange(SAMPLE_RATE) / SAMPLE_RATE
+    burst = 0.3 * torch.sin(2 * torch.pi * 220 * t)
+    burst[int(0.8 * SAMPLE_RATE):] = 0.0
+    return burst.repeat(seconds).view(1, 1, -1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=30)
+    parser.add_argument("--segments", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--latency", type=float, default=0.2, help="Simulated base latency in seconds")
+    parser.add_argument("--seconds-per-mb", type=float, default=0.05,
+                        help="Simulated processing time per uploaded megabyte")
+    args = parser.parse_args()
+    
+    # Keep the benchmark out of the user's cache directory (set before the package reads it)
+    cache_dir = tempfile.mkdtemp(prefix="elevenlabs-bench-")
+    os.environ["ELEVENLABS_CACHE_DIR"] = cache_dir
+    package = load_package()
+    api = sys.modules[f"{package.__name__}.utils.api"]
+    scheduler = sys.modules[f"{package.__name__}.utils.scheduler"].RequestScheduler
+    stt = sys.modules[f"{package.__name__}.nodes.stt"].ElevenLabsSpeechToText
+    vad = sys.modules[f"{package.__name__}.utils.vad"]
+    
+    max_segments = max(args.segments)
+    server, base_url = start_mock_server(latency=args.latency, seconds_per_mb=args.seconds_per_mb)
+    api.ElevenLabsClient.configure(base_url=base_url, pool_size=max_segments)
+    scheduler.requests_per_second = 0
+    scheduler.default_concurrency = max_segments
+    
+    audio = {"waveform": make_speech_like(args.minutes), "sample_rate": SAMPLE_RATE}
+    duration = args.minutes * 60
+    timings = []
+    for count in args.segments:
+        # Cuts land at quiet points up to 20% before the limit, so leave headroom for `count` segments
+        segment_seconds = int(duration / count * 1.1) + 1
+        segments = len(vad.split_at_silence(audio["waveform"], SAMPLE_RATE, segment_seconds))
+        start = time.perf_counter()
+        text, _ = stt().transcribe_audio("benchmark-key", audio, "scribe_v1", "auto", upload_format="wav",
+                                         silence_trimming="off", segment_seconds=segment_seconds,
+                                         max_parallel=segments, use_cache=False)
+        timings.append((segments, time.perf_counter() - start))
+        assert not text.startswith("Error"), text
+    server.shutdown()
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    
+    baseline = timings[0][1]
+    print(f"\n{args.minutes:g} min of audio, {args.latency * 1000:.0f} ms latency + "
+          f"{args.seconds_per_mb * 1000:.0f} ms/MB simulated processing")
+    for count, elapsed in timings:
+        print(f"  {count:3d} segment(s): {elapsed:7.2f}s  speedup {baseline / elapsed:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
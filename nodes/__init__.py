@@ -2,11 +2,13 @@
 
 # Import all nodes
 from .tts import ElevenLabsTTS
+from .tts_batch import ElevenLabsBatchTTS
 from .stt import ElevenLabsSpeechToText
 from .sound_effects import ElevenLabsSoundEffects
 from .voice_isolator import ElevenLabsVoiceIsolator
 from .voice_changer import ElevenLabsVoiceChanger
 from .dubbing import ElevenLabsDubbing
+from .dubbing_result import ElevenLabsDubbingResult
 from .voice_design import ElevenLabsVoiceDesign
 from .voice_clone import ElevenLabsVoiceClone
 from .music import ElevenLabsMusic
@@ -18,11 +20,13 @@ from .voice_manager import ElevenLabsVoiceManager
 # Export all node classes
 NODE_CLASS_MAPPINGS = {
     "ElevenLabsTTS": ElevenLabsTTS,
+    "ElevenLabsBatchTTS": ElevenLabsBatchTTS,
     "ElevenLabsSpeechToText": ElevenLabsSpeechToText,
     "ElevenLabsSoundEffects": ElevenLabsSoundEffects,
     "ElevenLabsVoiceIsolator": ElevenLabsVoiceIsolator,
     "ElevenLabsVoiceChanger": ElevenLabsVoiceChanger,
     "ElevenLabsDubbing": ElevenLabsDubbing,
+    "ElevenLabsDubbingResult": ElevenLabsDubbingResult,
     "ElevenLabsVoiceDesign": ElevenLabsVoiceDesign,
     "ElevenLabsVoiceClone": ElevenLabsVoiceClone,
     "ElevenLabsMusic": ElevenLabsMusic,
@@ -34,11 +38,13 @@ NODE_CLASS_MAPPINGS = {
 
 NODE_DISPLAY_NAME_MAPPINGS = {
     "ElevenLabsTTS": "ElevenLabs Text-to-Speech",
+    "ElevenLabsBatchTTS": "ElevenLabs Batch Text-to-Speech",
     "ElevenLabsSpeechToText": "ElevenLabs Speech-to-Text",
     "ElevenLabsSoundEffects": "ElevenLabs Sound Effects",
     "ElevenLabsVoiceIsolator": "ElevenLabs Voice Isolator",
     "ElevenLabsVoiceChanger": "ElevenLabs Voice Changer",
     "ElevenLabsDubbing": "ElevenLabs Dubbing",
+    "ElevenLabsDubbingResult": "ElevenLabs Fetch Dubbing Result",
     "ElevenLabsVoiceDesign": "ElevenLabs Voice Design",
     "ElevenLabsVoiceClone": "ElevenLabs Voice Clone",
     "ElevenLabsMusic": "ElevenLabs Music Generation",
@@ -1,13 +1,16 @@
 """Dubbing Node - Dub audio/video into different languages"""
 
 import requests
-import time
+from ..utils.api import ElevenLabsClient, map_concurrently
+from ..utils.audio import UPLOAD_CODECS, UPLOAD_CONDITIONING, condition_upload, encode_upload
+from ..utils.fingerprint import input_fingerprint
+from ..utils.jobs import DubbingJobManager
 
 
 class ElevenLabsDubbing:
     """
     Dubbing - Automatically dub audio or video into different languages
-    Note: This is an async operation that requires polling for completion
+    Submits the job(s) and returns their IDs at once; connect them to Fetch Dubbing Result
     """
     
     @classmethod
@@ -32,32 +35,67 @@ class ElevenLabsDubbing:
                 }),
             },
             "optional": {
+                # Kept in its original slot so saved workflows restore the widgets after it correctly
                 "wait_for_completion": ("BOOLEAN", {
-                    "default": True,
+                    "default": False,
                     "label_on": "Wait",
-                    "label_off": "Don't Wait"
+                    "label_off": "Don't Wait",
+                    "tooltip": "Deprecated and ignored: jobs always run in the background; use Fetch Dubbing Result"
+                }),
+                "upload_format": (list(UPLOAD_CODECS), {
+                    "default": "mp3",
+                    "tooltip": "Codec used to upload the audio; MP3 keeps long dubbing sources small"
+                }),
+                "upload_conditioning": (list(UPLOAD_CONDITIONING), {
+                    "default": "auto",
+                    "tooltip": "Sample rate/channels uploaded; auto matches what this endpoint needs"
+                }),
+                "regenerate": ("INT", {
+                    "default": 0,
+                    "min": 0,
+                    "max": 4294967295,
+                    "tooltip": "Change to call the API again even though no other input changed"
+                }),
+                "target_languages": ("STRING", {
+                    "multiline": False,
+                    "default": "",
+                    "tooltip": "Comma-separated language codes (e.g. es, fr, de) to dub into at once; overrides target_language"
                 }),
             }
         }
     
     RETURN_TYPES = ("STRING",)
-    RETURN_NAMES = ("dubbing_id_or_status",)
+    RETURN_NAMES = ("dubbing_ids",)
     FUNCTION = "create_dubbing"
     CATEGORY = "ElevenLabs"
     OUTPUT_NODE = True
     
-    def create_dubbing(self, api_key, audio, target_language, source_language, num_speakers, wait_for_completion=True):
-        """
-        Create a dubbing project
-        Returns dubbing_id or status message
+    @staticmethod
+    def parse_languages(target_language, target_languages=""):
         """
-        from ..utils.audio import tensor_to_wav_buffer
-        
-        url = "https://api.elevenlabs.io/v1/dubbing"
+        Languages to dub into: the comma-separated list if given, otherwise the dropdown choice
         
-        # Convert audio tensor to WAV
-        wav_buffer = tensor_to_wav_buffer(audio["waveform"], audio["sample_rate"])
+        Returns:
+            List of language codes without duplicates, in input order
+        """
+        languages = [code.strip() for code in target_languages.replace("\n", ",").split(",") if code.strip()]
+        return list(dict.fromkeys(languages)) or [target_language]
+    
+    @staticmethod
+    def request_dubbing(api_key, upload, target_language, source_language, num_speakers):
+        """
+        Create one dubbing project and register it with the background poller
         
+        Args:
+            api_key: ElevenLabs API key
+            upload: (filename, content, mime) tuple from encode_upload, reused across languages
+            target_language: Language code to dub into
+            source_language: Language code of the source, or "auto"
+            num_speakers: Number of distinct speakers
+            
+        Returns:
+            dubbing_id of the new job
+        """
         headers = {
             "xi-api-key": api_key,
         }
@@ -72,67 +110,69 @@ class ElevenLabsDubbing:
             data["source_lang"] = source_language
         
         files = {
-            "file": ("audio.wav", wav_buffer, "audio/wav")
+            "file": upload
         }
         
-        try:
-            # Create dubbing project
-            response = requests.post(url, headers=headers, data=data, files=files, timeout=120)
-            response.raise_for_status()
-            
-            result = response.json()
-            dubbing_id = result.get("dubbing_id")
-            
-            if not dubbing_id:
-                return ("Error: No dubbing_id returned",)
-            
-            print(f"✓ Dubbing project created: {dubbing_id}")
-            
-            # If wait for completion, poll the status
-            if wait_for_completion:
-                return (self._wait_for_dubbing(api_key, dubbing_id),)
-            else:
-                return (f"Dubbing ID: {dubbing_id}\nStatus: Processing\nUse this ID to check status later.",)
-            
-        except requests.exceptions.RequestException as e:
-            error_msg = f"Error creating dubbing: {str(e)}"
-            print(error_msg)
-            if hasattr(e, 'response') and e.response is not None:
-                print(f"Response: {e.response.text}")
-            return (error_msg,)
+        response = ElevenLabsClient.post_multipart("/v1/dubbing", headers=headers, data=data, files=files)
+        response.raise_for_status()
+        
+        result = response.json()
+        dubbing_id = result.get("dubbing_id")
+        if not dubbing_id:
+            raise ValueError("No dubbing_id returned")
+        
+        expected = result.get("expected_duration_sec")
+        DubbingJobManager.submit(api_key, dubbing_id, target_language, expected)
+        print(f"✓ Dubbing project created: {dubbing_id} ({target_language})"
+              + (f", expected to take ~{expected:.0f}s" if expected else ""))
+        return dubbing_id
     
-    def _wait_for_dubbing(self, api_key, dubbing_id, max_wait=300):
-        """Poll dubbing status until complete or timeout"""
-        url = f"https://api.elevenlabs.io/v1/dubbing/{dubbing_id}"
-        headers = {
-            "xi-api-key": api_key,
-        }
+    def create_dubbing(self, api_key, audio, target_language, source_language, num_speakers, wait_for_completion=False,
+                       upload_format="mp3", upload_conditioning="auto", regenerate=0, target_languages=""):
+        """
+        Create dubbing projects without waiting for them
+        
+        The audio is encoded once and submitted for every target language
+        concurrently. The jobs are handed to DubbingJobManager, which polls them
+        all from one background thread; the Fetch Dubbing Result node returns
+        the audio once it is ready.
+        
+        Returns:
+            Tuple of (comma-separated dubbing_ids,), or an error message
+        """
+        if wait_for_completion:
+            print("⚠️ wait_for_completion is no longer supported: the job runs in the background, "
+                  "collect its audio with Fetch Dubbing Result")
+        languages = self.parse_languages(target_language, target_languages)
+        
+        # Downmix/resample to what the endpoint needs, then encode in the upload codec (once for all languages)
+        upload_waveform, upload_rate = condition_upload(audio["waveform"], audio["sample_rate"],
+                                                        "dubbing", upload_conditioning)
+        upload = encode_upload(upload_waveform, upload_rate, upload_format)
+        
+        if len(languages) > 1:
+            print(f"🔀 Submitting dubbing into {len(languages)} languages: {', '.join(languages)}")
         
-        start_time = time.time()
-        while time.time() - start_time < max_wait:
+        def submit(language):
             try:
-                response = requests.get(url, headers=headers, timeout=10)
-                response.raise_for_status()
-                result = response.json()
-                
-                status = result.get("status", "unknown")
-                print(f"Dubbing status: {status}")
-                
-                if status == "dubbed":
-                    return (f"✓ Dubbing complete!\nID: {dubbing_id}\nStatus: {status}\n"
-                           f"Download URL available in API response.")
-                elif status == "dubbing":
-                    time.sleep(10)  # Wait 10 seconds before next check
-                    continue
-                else:
-                    return (f"Dubbing ID: {dubbing_id}\nStatus: {status}")
-                    
-            except requests.exceptions.RequestException as e:
-                return (f"Error checking dubbing status: {str(e)}",)
+                return self.request_dubbing(api_key, upload, language, source_language, num_speakers)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                print(f"❌ Error creating dubbing ({language}): {str(e)}")
+                if hasattr(e, 'response') and e.response is not None:
+                    print(f"Response: {e.response.text}")
+                return None
         
-        return (f"Dubbing timeout after {max_wait}s\nID: {dubbing_id}\nCheck status manually.",)
+        dubbing_ids = map_concurrently(submit, languages)
+        submitted = [dubbing_id for dubbing_id in dubbing_ids if dubbing_id]
+        if not submitted:
+            return ("Error creating dubbing: every submission failed",)
+        if len(submitted) < len(languages):
+            failed = [language for language, dubbing_id in zip(languages, dubbing_ids) if not dubbing_id]
+            print(f"⚠️ Dubbing not submitted for: {', '.join(failed)}")
+        return (", ".join(submitted),)
     
     @classmethod
     def IS_CHANGED(cls, **kwargs):
-        return float("nan")
+        # Identical inputs reuse ComfyUI's cached output instead of re-billing the API
+        return input_fingerprint(kwargs)
 
@@ -0,0 +1,128 @@
+"""Fetch Dubbing Result Node - Collect the audio of a background dubbing job"""
+
+import torch
+from ..utils.audio import allocate_waveform, create_empty_audio, load_audio_from_file, resample
+from ..utils.jobs import DubbingJobManager
+
+
+class ElevenLabsDubbingResult:
+    """
+    Fetch Dubbing Result - Return the dubbed audio of one or more jobs once ready
+    Never waits: jobs still running are returned as silence with their status
+    """
+    
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "api_key": ("STRING", {
+                    "multiline": False,
+                    "default": ""
+                }),
+                "dubbing_id": ("STRING", {
+                    "multiline": False,
+                    "default": "",
+                    "tooltip": "ID(s) from the Dubbing node, comma-separated, or of a job created elsewhere"
+                }),
+            },
+            "optional": {
+                "target_language": (["auto", "es", "fr", "de", "it", "pt", "pl", "ru", "nl", "ja", "zh", "ko", "hi", "ar", "tr"], {
+                    "default": "auto",
+                    "tooltip": "Language of a job not submitted from this ComfyUI; auto reads it from the job"
+                }),
+                "memory_map": ("BOOLEAN", {
+                    "default": False,
+                    "tooltip": "Return the audio backed by a temporary file, keeping feature-length dubs out of RAM"
+                }),
+            }
+        }
+    
+    RETURN_TYPES = ("AUDIO", "STRING")
+    RETURN_NAMES = ("audio", "status")
+    FUNCTION = "fetch_result"
+    CATEGORY = "ElevenLabs"
+    
+    @staticmethod
+    def parse_ids(dubbing_ids):
+        """Split the Dubbing node's comma-separated ID list"""
+        return [dubbing_id.strip() for dubbing_id in dubbing_ids.replace("\n", ",").split(",")
+                if dubbing_id.strip() and not dubbing_id.strip().startswith("Error")]
+    
+    def fetch_result(self, api_key, dubbing_id, target_language="auto", memory_map=False):
+        """
+        Return the audio of every finished job and a status line per job
+        
+        Several IDs (a multi-language dubbing) give a batch [N, C, T] in ID
+        order; jobs that are not done yet are left silent.
+        """
+        dubbing_ids = self.parse_ids(dubbing_id)
+        if not dubbing_ids:
+            print("❌ Error: No dubbing ID provided")
+            return (create_empty_audio(), "Error: No dubbing ID provided")
+        
+        language = None if target_language == "auto" else target_language
+        results = []
+        lines = []
+        for job_id in dubbing_ids:
+            job = DubbingJobManager.track(api_key, job_id, language)
+            label = f"{job['target_language'] or '?'} ({job_id})"
+            if job["status"] == "failed":
+                lines.append(f"{label}: failed - {job['error']}")
+                results.append(None)
+            elif job["status"] != "dubbed":
+                elapsed = job["updated_at"] - job["created_at"]
+                lines.append(f"{label}: {job['status']} ({elapsed:.0f}s so far)")
+                results.append(None)
+            else:
+                path = DubbingJobManager.result_path(job_id, api_key)
+                if path is None:
+                    lines.append(f"{label}: dubbed, but the audio could not be downloaded")
+                    results.append(None)
+                    continue
+                waveform, sample_rate = load_audio_from_file(path, memory_map=memory_map)
+                lines.append(f"{label}: dubbed ({waveform.shape[-1] / sample_rate:.1f}s)")
+                results.append((waveform, sample_rate))
+        
+        status = "\n".join(lines)
+        ready = [result for result in results if result is not None]
+        print(("✓ " if len(ready) == len(results) else "🔄 ")
+              + f"Dubbing results: {len(ready)}/{len(results)} ready\n{status}")
+        if not ready:
+            return (create_empty_audio(), status + "\nQueue the workflow again to collect the audio once it is ready.")
+        
+        if len(results) == 1:
+            waveform, sample_rate = ready[0]
+            return ({"waveform": waveform, "sample_rate": sample_rate}, status)
+        
+        sample_rate = ready[0][1]
+        channels = max(waveform.shape[1] for waveform, _ in ready)
+        waveforms = []
+        for result in results:
+            if result is None:
+                waveforms.append(torch.zeros(1, channels, 0))
+                continue
+            waveform, rate = result
+            if rate != sample_rate:
+                waveform = resample(waveform, rate, sample_rate)
+            waveforms.append(waveform)
+        
+        output = allocate_waveform(channels, max(waveform.shape[2] for waveform in waveforms), memory_map,
+                                   batch=len(waveforms))
+        for index, waveform in enumerate(waveforms):
+            output[index, :waveform.shape[1], :waveform.shape[2]] = waveform[0]
+        return ({"waveform": output, "sample_rate": sample_rate}, status)
+    
+    @classmethod
+    def IS_CHANGED(cls, api_key, dubbing_id, target_language="auto", memory_map=False):
+        # Linked inputs arrive as None, so only a dubbing_id typed into the widget
+        # is keyed by job state; a linked ID re-runs this (cheap, local) node every queue
+        if not dubbing_id:
+            return float("nan")
+        # Re-run whenever the background poller has moved a job on
+        states = []
+        for job_id in cls.parse_ids(dubbing_id):
+            job = DubbingJobManager.get_job(job_id, api_key)
+            if job is None:
+                return float("nan")
+            states.append(f"{job_id}:{job['status']}:{job['result_path']}")
+        return "|".join(states)
@@ -1,6 +1,7 @@
 """History Node - View generation history"""
 
 import requests
+from ..utils.api import ElevenLabsClient
 
 
 class ElevenLabsHistory:
@@ -33,7 +34,7 @@ class ElevenLabsHistory:
     
     def get_history(self, api_key, page_size, refresh):
         """Get generation history"""
-        url = f"https://api.elevenlabs.io/v1/history?page_size={page_size}"
+        url = f"/v1/history?page_size={page_size}"
         
         headers = {
             "xi-api-key": api_key,
@@ -41,7 +42,7 @@ class ElevenLabsHistory:
         }
         
         try:
-            response = requests.get(url, headers=headers, timeout=10)
+            response = ElevenLabsClient.get(url, headers=headers)
             response.raise_for_status()
             
             data = response.json()
@@ -1,7 +1,10 @@
 """Music Generation Node"""
 
+import os
 import requests
-from ..utils.audio import load_audio_from_response, create_empty_audio
+from ..utils.api import ElevenLabsClient
+from ..utils.audio import load_audio_from_file, create_empty_audio
+from ..utils.fingerprint import input_fingerprint
 
 
 class ElevenLabsMusic:
@@ -40,6 +43,16 @@ class ElevenLabsMusic:
                     "max": 2.0,
                     "step": 0.1
                 }),
+                "memory_map": ("BOOLEAN", {
+                    "default": False,
+                    "tooltip": "Return the audio backed by a temporary file, keeping long tracks out of RAM"
+                }),
+                "regenerate": ("INT", {
+                    "default": 0,
+                    "min": 0,
+                    "max": 4294967295,
+                    "tooltip": "Change to call the API again even though no other input changed"
+                }),
             }
         }
     
@@ -47,14 +60,15 @@ class ElevenLabsMusic:
     FUNCTION = "generate_music"
     CATEGORY = "ElevenLabs"
     
-    def generate_music(self, api_key, prompt, duration_seconds, model, input_prompt=None, temperature=1.0):
+    def generate_music(self, api_key, prompt, duration_seconds, model, input_prompt=None, temperature=1.0,
+                       memory_map=False, regenerate=0):
         """Generate music from text prompt"""
         
         final_prompt = input_prompt if input_prompt is not None else prompt
         
         # Note: This endpoint might not be publicly available yet
         # Using a placeholder URL - check ElevenLabs docs for actual endpoint
-        url = "https://api.elevenlabs.io/v1/music-generation"
+        url = "/v1/music-generation"
         
         headers = {
             "xi-api-key": api_key,
@@ -70,10 +84,13 @@ class ElevenLabsMusic:
         }
         
         try:
-            response = requests.post(url, headers=headers, json=payload, timeout=max(60, int(duration_seconds * 2)))
-            response.raise_for_status()
-            
-            waveform, sample_rate = load_audio_from_response(response.content)
+            # Stream the track to disk and decode it from there, so a 300s track is never held as bytes
+            path = ElevenLabsClient.download("POST", url, headers=headers, json=payload,
+                                             timeout=max(60, int(duration_seconds * 2)))
+            try:
+                waveform, sample_rate = load_audio_from_file(path, memory_map=memory_map)
+            finally:
+                os.remove(path)
             
             print(f"✓ Generated music: {duration_seconds}s - '{final_prompt}'")
             return ({"waveform": waveform, "sample_rate": sample_rate},)
@@ -98,5 +115,6 @@ Check the ElevenLabs documentation for:
     
     @classmethod
     def IS_CHANGED(cls, **kwargs):
-        return float("nan")
+        # Identical inputs reuse ComfyUI's cached output instead of re-billing the API
+        return input_fingerprint(kwargs)
 
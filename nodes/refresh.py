@@ -39,12 +39,12 @@ class ElevenLabsRefreshVoices:
         results = []
         
         if refresh_voices:
-            ElevenLabsCache.force_refresh_voices()
+            ElevenLabsCache.force_refresh_voices(api_key or None)
             voices = fetch_voices_from_api(api_key)
             results.append(f"✓ Refreshed {len(voices)} voices")
         
         if refresh_models:
-            ElevenLabsCache.force_refresh_models()
+            ElevenLabsCache.force_refresh_models(api_key or None)
             models = fetch_models_from_api(api_key)
             results.append(f"✓ Refreshed {len(models)} models")
         
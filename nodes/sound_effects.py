@@ -1,7 +1,10 @@
 """Sound Effects Generation Node"""
 
 import requests
+from ..utils.api import ElevenLabsClient
 from ..utils.audio import load_audio_from_response, create_empty_audio
+from ..utils.scheduler import RequestCoalescer
+from ..utils.fingerprint import input_fingerprint
 
 
 class ElevenLabsSoundEffects:
@@ -34,6 +37,12 @@ class ElevenLabsSoundEffects:
             },
             "optional": {
                 "input_text": ("STRING", {"forceInput": True}),
+                "regenerate": ("INT", {
+                    "default": 0,
+                    "min": 0,
+                    "max": 4294967295,
+                    "tooltip": "Change to call the API again even though no other input changed"
+                }),
             }
         }
     
@@ -41,11 +50,11 @@ class ElevenLabsSoundEffects:
     FUNCTION = "generate_sound_effect"
     CATEGORY = "ElevenLabs"
     
-    def generate_sound_effect(self, api_key, text, duration_seconds, prompt_influence, input_text=None):
+    def generate_sound_effect(self, api_key, text, duration_seconds, prompt_influence, input_text=None, regenerate=0):
         """Generate sound effects"""
         final_text = input_text if input_text is not None else text
         
-        url = "https://api.elevenlabs.io/v1/sound-generation"
+        url = "/v1/sound-generation"
         
         headers = {
             "xi-api-key": api_key,
@@ -59,11 +68,16 @@ class ElevenLabsSoundEffects:
             "prompt_influence": prompt_influence
         }
         
-        try:
-            response = requests.post(url, headers=headers, json=payload, timeout=60)
+        def request_sound_effect():
+            response = ElevenLabsClient.post(url, headers=headers, json=payload)
             response.raise_for_status()
-            
-            waveform, sample_rate = load_audio_from_response(response.content)
+            return load_audio_from_response(response.content)
+        
+        try:
+            # Identical requests already in flight share one call
+            flight_key = RequestCoalescer.make_key(url, payload, api_key)
+            waveform, sample_rate = RequestCoalescer.run(flight_key, request_sound_effect,
+                                                         characters=len(final_text))
             
             print(f"✓ Generated sound effect: {duration_seconds}s - '{final_text}'")
             return ({"waveform": waveform, "sample_rate": sample_rate},)
@@ -76,5 +90,6 @@ class ElevenLabsSoundEffects:
     
     @classmethod
     def IS_CHANGED(cls, **kwargs):
-        return float("nan")
+        # Identical inputs reuse ComfyUI's cached output instead of re-billing the API
+        return input_fingerprint(kwargs)
 
@@ -1,7 +1,15 @@
 """Speech-to-Text Node"""
 
+import json
+import os
+import time
 import requests
-from ..utils.audio import tensor_to_wav_buffer
+from ..utils.api import ElevenLabsClient, map_concurrently
+from ..utils.audio import (UPLOAD_CODECS, UPLOAD_CONDITIONING, condition_upload, encode_uploads,
+                           audio_fingerprint)
+from ..utils.cache import DiskCache
+from ..utils.segmented import call_with_retries
+from ..utils.vad import TRIM_MODES, trim_silence, split_at_silence
 
 
 class ElevenLabsSpeechToText:
@@ -22,27 +30,62 @@ class ElevenLabsSpeechToText:
                 "language": (["auto", "en", "es", "fr", "de", "it", "pt", "ja", "zh", "ko", "ru", "ar", "hi"], {
                     "default": "auto"
                 }),
+            },
+            "optional": {
+                "upload_format": (list(UPLOAD_CODECS), {
+                    "default": "opus",
+                    "tooltip": "Codec used to upload the audio; compact Opus is plenty for transcription"
+                }),
+                "upload_conditioning": (list(UPLOAD_CONDITIONING), {
+                    "default": "auto",
+                    "tooltip": "Sample rate/channels uploaded; auto matches what this endpoint needs"
+                }),
+                "silence_trimming": (list(TRIM_MODES), {
+                    "default": "off",
+                    "tooltip": "Skip silence before upload (less billed audio); word timestamps stay on the original timeline"
+                }),
+                "segment_seconds": ("INT", {
+                    "default": 300,
+                    "min": 0,
+                    "max": 3600,
+                    "tooltip": "Longer audio is split at quiet points and segments are transcribed in parallel (0 = never split)"
+                }),
+                "max_parallel": ("INT", {
+                    "default": 4,
+                    "min": 1,
+                    "max": 16,
+                    "tooltip": "Segments transcribed at once"
+                }),
+                "use_cache": ("BOOLEAN", {
+                    "default": True,
+                    "tooltip": "Reuse the transcript of identical audio instead of transcribing it again"
+                }),
             }
         }
     
-    RETURN_TYPES = ("STRING",)
-    RETURN_NAMES = ("transcription",)
+    RETURN_TYPES = ("STRING", "STRING")
+    RETURN_NAMES = ("transcription", "words")
     FUNCTION = "transcribe_audio"
     CATEGORY = "ElevenLabs"
     
-    def transcribe_audio(self, api_key, audio, model, language):
-        """Transcribe audio to text"""
-        url = "https://api.elevenlabs.io/v1/speech-to-text"
-        
-        # Convert audio tensor to WAV
-        wav_buffer = tensor_to_wav_buffer(audio["waveform"], audio["sample_rate"])
+    # Persistent transcripts keyed by audio fingerprint, model and language
+    transcript_cache = DiskCache("stt", int(os.environ.get("ELEVENLABS_STT_CACHE_MB", "256")) * 1024 * 1024,
+                                 suffix=".json")
+    
+    @staticmethod
+    def request_transcript(api_key, upload, model, language):
+        """
+        Transcribe one encoded upload
         
+        Returns:
+            Parsed API response with "text" and "words"
+        """
         headers = {
             "xi-api-key": api_key
         }
         
         files = {
-            "audio": ("audio.wav", wav_buffer, "audio/wav")
+            "audio": upload
         }
         
         data = {
@@ -52,20 +95,84 @@ class ElevenLabsSpeechToText:
         if language != "auto":
             data["language"] = language
         
-        try:
-            response = requests.post(url, headers=headers, files=files, data=data, timeout=60)
-            response.raise_for_status()
-            
-            result = response.json()
-            transcription = result.get("text", "")
-            
-            print(f"✓ Transcribed audio: {len(transcription)} characters")
-            return (transcription,)
-            
-        except requests.exceptions.RequestException as e:
+        response = ElevenLabsClient.post_multipart("/v1/speech-to-text", headers=headers, files=files, data=data)
+        response.raise_for_status()
+        return response.json()
+    
+    def transcribe_audio(self, api_key, audio, model, language, upload_format="opus",
+                         upload_conditioning="auto", silence_trimming="off", segment_seconds=300,
+                         max_parallel=4, use_cache=True):
+        """Transcribe audio to text"""
+        if use_cache:
+            start_time = time.perf_counter()
+            cache_key = DiskCache.make_key(audio_fingerprint(audio["waveform"], audio["sample_rate"]), model, language)
+            blob = self.transcript_cache.get(cache_key)
+            if blob is not None:
+                try:
+                    result = json.loads(blob)
+                    print(f"✓ STT cache hit: {len(result['text'])} characters "
+                          f"(fingerprint in {time.perf_counter() - start_time:.2f}s, no upload)")
+                    return (result["text"], json.dumps(result["words"]))
+                except (ValueError, KeyError) as e:
+                    print(f"⚠️ Ignoring unreadable STT cache entry: {str(e)}")
+        
+        # Downmix/resample to what the endpoint needs, then encode in the upload codec
+        upload_waveform, upload_rate = condition_upload(audio["waveform"], audio["sample_rate"],
+                                                        "speech_to_text", upload_conditioning)
+        upload_waveform, silence_map = trim_silence(upload_waveform, upload_rate, silence_trimming)
+        
+        # Long audio is cut at quiet points and the segments are transcribed concurrently
+        segments = split_at_silence(upload_waveform, upload_rate, segment_seconds)
+        uploads = encode_uploads([(upload_waveform[..., start:end], upload_rate) for start, end in segments],
+                                 upload_format, max_workers=max_parallel, label="Segment")
+        if len(segments) > 1:
+            print(f"🔀 Transcribing {len(segments)} segments of up to {segment_seconds}s, "
+                  f"{max_parallel} in parallel")
+        
+        def transcribe(index):
+            try:
+                return call_with_retries(lambda: self.request_transcript(api_key, uploads[index], model, language),
+                                         index, len(segments)), None
+            except requests.exceptions.RequestException as e:
+                return None, e
+        
+        start_time = time.perf_counter()
+        results = map_concurrently(transcribe, range(len(segments)), limit=max_parallel)
+        elapsed = time.perf_counter() - start_time
+        
+        if all(result is None for result, _ in results):
+            e = results[-1][1]
             error_msg = f"Error in speech-to-text: {str(e)}"
             print(error_msg)
             if hasattr(e, 'response') and e.response is not None:
                 print(f"Response: {e.response.text}")
-            return (error_msg,)
-
+            return (error_msg, "[]")
+        
+        texts = []
+        words = []
+        failed = 0
+        for index, ((segment_start, _), (result, _)) in enumerate(zip(segments, results)):
+            if result is None:
+                failed += 1
+                texts.append(f"[segment {index + 1} failed]")
+                continue
+            texts.append(result.get("text", "").strip())
+            
+            # Word timestamps refer to the trimmed segment; move them back to the original timeline
+            offset = segment_start / upload_rate
+            for word in result.get("words", []):
+                if "start" in word and "end" in word:
+                    word = dict(word, start=round(silence_map.to_original(offset + word["start"]), 3),
+                                end=round(silence_map.to_original(offset + word["end"], end=True), 3))
+                words.append(word)
+        transcription = " ".join(text for text in texts if text)
+        
+        print(f"✓ Transcribed audio: {len(transcription)} characters in {elapsed:.2f}s")
+        if failed:
+            print(f"⚠️ {failed}/{len(segments)} segment(s) failed and are marked in the transcription")
+        elif use_cache:
+            # Keep the full response (language detection etc.) with text and words on the original timeline
+            response = next(result for result, _ in results)
+            response = dict(response, text=transcription, words=words)
+            self.transcript_cache.put(cache_key, json.dumps(response).encode("utf-8"))
+        return (transcription, json.dumps(words))
@@ -1,15 +1,35 @@
 """Text-to-Speech Node"""
 
+import os
+import time
 import requests
-from ..utils.api import fetch_voices_from_api, fetch_models_from_api
-from ..utils.audio import load_audio_from_response, create_empty_audio
-from ..utils.cache import ElevenLabsCache
+import torchaudio
+from ..utils.api import (ElevenLabsClient, fetch_voices_from_api, fetch_models_from_api, map_concurrently,
+                         MODEL_CHAR_LIMITS, DEFAULT_CHAR_LIMIT)
+from ..utils.audio import (load_audio_from_response, create_empty_audio, encode_audio_blob, decode_audio_blob,
+                           concat_with_crossfade, pcm_sample_rate, PCMStreamDecoder, resolve_output_format)
+from ..utils.cache import ElevenLabsCache, DiskCache
+from ..utils.scheduler import RequestCoalescer
+from ..utils.text import split_text
+
+
+# Models that don't accept previous_text/next_text request stitching context
+MODELS_WITHOUT_TEXT_CONTEXT = {"eleven_v3"}
+# Characters of neighbouring chunk text sent as context
+CONTEXT_CHARS = 500
+# Bytes read per iteration when streaming
+STREAM_CHUNK_BYTES = 4096
 
 
 class ElevenLabsTTS:
     """Enhanced Text-to-Speech node with all parameters"""
     
-    _last_api_key = None
+    # Persistent results keyed by everything that affects the generated audio
+    result_cache = DiskCache("tts", int(os.environ.get("ELEVENLABS_TTS_CACHE_MB", "1024")) * 1024 * 1024)
+    # Callables receiving (new_samples, sample_rate) as streamed audio is decoded, e.g. for live preview
+    stream_listeners = []
+    # Latency metrics of the most recent streamed request
+    last_stream_stats = {}
     
     @classmethod
     def INPUT_TYPES(cls):
@@ -61,14 +81,46 @@ class ElevenLabsTTS:
                 "language_code": (["auto", "en", "es", "fr", "de", "it", "pt", "pl", "ru", "nl", "ja", "zh", "ko", "hi", "ar"], {
                     "default": "auto"
                 }),
-                "output_format": (["mp3_44100_128", "mp3_44100_192", "pcm_16000", "pcm_22050", "pcm_24000", "pcm_44100"], {
-                    "default": "mp3_44100_128"
+                "output_format": (["mp3_44100_128", "mp3_44100_192", "pcm_16000", "pcm_22050", "pcm_24000", "pcm_44100", "auto"], {
+                    "default": "mp3_44100_128",
+                    "tooltip": "auto: raw PCM at target_sample_rate, skipping MP3 decode entirely"
                 }),
                 "seed": ("INT", {
                     "default": -1,
                     "min": -1,
                     "max": 4294967295
                 }),
+                "use_cache": ("BOOLEAN", {
+                    "default": True,
+                    "tooltip": "Reuse previously generated audio for identical inputs instead of re-billing characters"
+                }),
+                "chunking": (["auto", "always", "off"], {
+                    "default": "auto",
+                    "tooltip": "Split long text into chunks synthesized in parallel. auto: only when text exceeds the model's limit"
+                }),
+                "chunk_chars": ("INT", {
+                    "default": 2000,
+                    "min": 100,
+                    "max": 40000,
+                    "tooltip": "Target characters per chunk (capped at the model's limit)"
+                }),
+                "max_parallel": ("INT", {
+                    "default": 4,
+                    "min": 1,
+                    "max": 16,
+                    "tooltip": "Chunks synthesized at once"
+                }),
+                "streaming": ("BOOLEAN", {
+                    "default": False,
+                    "tooltip": "Use the streaming endpoint for lower time-to-first-audio. pcm_* formats decode incrementally as data arrives"
+                }),
+                # Appended last: saved workflows restore widget values by position
+                "target_sample_rate": ("INT", {
+                    "default": 24000,
+                    "min": 16000,
+                    "max": 44100,
+                    "tooltip": "Sample rate the workflow needs when output_format is auto"
+                }),
             }
         }
     
@@ -77,17 +129,18 @@ class ElevenLabsTTS:
     CATEGORY = "ElevenLabs"
     
     def generate_speech(self, api_key, text, voice, model, stability, similarity_boost, style, use_speaker_boost, 
-                       input_text=None, language_code="auto", output_format="mp3_44100_128", seed=-1):
-        
-        # Auto-refresh voices when API key changes
-        if api_key and api_key != self.__class__._last_api_key:
-            print(f"\n🔄 New API key detected - Auto-refreshing voices...")
-            ElevenLabsCache.force_refresh_voices()
-            ElevenLabsCache.force_refresh_models()
-            fetch_voices_from_api(api_key, force_refresh=True)
-            fetch_models_from_api(api_key, force_refresh=True)
-            self.__class__._last_api_key = api_key
-            print("✓ Voices and models refreshed! Reload node to see updates\n")
+                       input_text=None, language_code="auto", output_format="mp3_44100_128", seed=-1,
+                       use_cache=True, chunking="auto", chunk_chars=2000, max_parallel=4, streaming=False,
+                       target_sample_rate=24000):
+        
+        # Voices are cached per API key, so switching keys only fetches on first use
+        if api_key:
+            ElevenLabsCache.set_active_tenant(api_key)
+            if not ElevenLabsCache.is_voices_cache_valid(api_key):
+                print(f"\n🔄 New API key detected - Auto-refreshing voices...")
+                fetch_voices_from_api(api_key)
+                fetch_models_from_api(api_key)
+                print("✓ Voices and models refreshed! Reload node to see updates\n")
         
         # Use input_text if provided, otherwise use the text from the textbox
         final_text = input_text if input_text is not None else text
@@ -98,35 +151,18 @@ class ElevenLabsTTS:
         
         voice_id = voice.split("(")[-1].strip(")")
         voice_name = voice.split("(")[0].strip()
+        output_format = resolve_output_format(output_format, target_sample_rate)
         
-        url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
-        
-        headers = {
-            "Accept": "audio/mpeg",
-            "xi-api-key": api_key,
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "text": final_text,
-            "model_id": model,
-            "voice_settings": {
-                "stability": stability,
-                "similarity_boost": similarity_boost,
-                "style": style,
-                "use_speaker_boost": use_speaker_boost
-            }
-        }
-        
-        # Add optional parameters
-        if language_code != "auto":
-            payload["language_code"] = language_code
+        payload = self.build_payload(final_text, model, stability, similarity_boost, style, use_speaker_boost,
+                                     language_code, seed)
         
-        if seed >= 0:
-            payload["seed"] = seed
-        
-        # Add output format as query parameter
-        url_with_params = f"{url}?output_format={output_format}"
+        # Split long scripts at sentence/paragraph boundaries under the model's limit
+        char_limit = MODEL_CHAR_LIMITS.get(model, DEFAULT_CHAR_LIMIT)
+        chunk_size = min(chunk_chars, char_limit)
+        if chunking == "always" or (chunking == "auto" and len(final_text) > char_limit):
+            chunks = split_text(final_text, chunk_size)
+        else:
+            chunks = [final_text]
         
         # Log request details for API workflow conversion
         print("\n" + "="*60)
@@ -137,17 +173,35 @@ class ElevenLabsTTS:
         print(f"Model: {model}")
         print(f"Language: {language_code}")
         print(f"Text length: {len(final_text)} chars")
+        if len(chunks) > 1:
+            print(f"Chunks: {len(chunks)} x <={chunk_size} chars, {max_parallel} in parallel")
         print(f"Output format: {output_format}")
         print(f"Settings: stability={stability}, similarity={similarity_boost}, style={style}")
         if seed >= 0:
             print(f"Seed: {seed}")
         print("="*60 + "\n")
         
+        cache_key = self.cache_key(voice_id, payload, output_format, chunk_size if len(chunks) > 1 else None)
+        if use_cache:
+            blob = self.result_cache.get(cache_key)
+            if blob is not None:
+                try:
+                    waveform, sample_rate = decode_audio_blob(blob)
+                    print(f"✓ TTS cache hit: {len(final_text)} chars, {waveform.shape[2]/sample_rate:.2f}s (no API call)")
+                    return ({"waveform": waveform, "sample_rate": sample_rate},)
+                except Exception as e:
+                    print(f"⚠️ Ignoring unreadable TTS cache entry: {str(e)}")
+        
         try:
-            response = requests.post(url_with_params, headers=headers, json=payload, timeout=30)
-            response.raise_for_status()
-            
-            waveform, sample_rate = load_audio_from_response(response.content)
+            if len(chunks) > 1:
+                waveform, sample_rate = self._generate_chunked(api_key, voice_id, payload, output_format,
+                                                               chunks, max_parallel)
+            elif streaming:
+                waveform, sample_rate = self.stream_speech(api_key, voice_id, payload, output_format)
+            else:
+                waveform, sample_rate = self.request_speech(api_key, voice_id, payload, output_format)
+            if use_cache:
+                self.result_cache.put(cache_key, encode_audio_blob(waveform, sample_rate))
             
             print(f"✓ Generated speech: {len(final_text)} chars, {waveform.shape[2]/sample_rate:.2f}s")
             print(f"  Audio: {sample_rate}Hz, {waveform.shape}")
@@ -162,13 +216,164 @@ class ElevenLabsTTS:
             print(f"   Voice ID: {voice_id}")
             print(f"   Model: {model}")
             print(f"   Text length: {len(final_text)} characters")
-            print(f"   URL: {url_with_params}")
+            print(f"   URL: {ElevenLabsClient.build_url(f'/v1/text-to-speech/{voice_id}?output_format={output_format}')}")
             return (create_empty_audio(),)
     
+    @staticmethod
+    def build_payload(text, model, stability, similarity_boost, style, use_speaker_boost,
+                      language_code="auto", seed=-1):
+        """Build the JSON body of a text-to-speech request"""
+        payload = {
+            "text": text,
+            "model_id": model,
+            "voice_settings": {
+                "stability": stability,
+                "similarity_boost": similarity_boost,
+                "style": style,
+                "use_speaker_boost": use_speaker_boost
+            }
+        }
+        
+        # Add optional parameters
+        if language_code != "auto":
+            payload["language_code"] = language_code
+        
+        if seed >= 0:
+            payload["seed"] = seed
+        
+        return payload
+    
+    @staticmethod
+    def cache_key(voice_id, payload, output_format, chunk_size=None):
+        """Result cache key covering everything that affects the generated audio"""
+        return DiskCache.make_key(voice_id, payload["model_id"], payload["text"], payload["voice_settings"],
+                                  payload.get("language_code", "auto"), payload.get("seed", -1), output_format,
+                                  chunk_size)
+    
+    @staticmethod
+    def request_speech(api_key, voice_id, payload, output_format):
+        """
+        Send one text-to-speech request and decode the audio
+        
+        Identical requests already in flight (duplicate nodes, re-queued
+        graphs) share one call.
+        
+        Returns:
+            Tuple of (waveform, sample_rate); raises RequestException on failure
+        """
+        # Output format goes in the query string
+        url_with_params = f"/v1/text-to-speech/{voice_id}?output_format={output_format}"
+        headers = {
+            "Accept": "audio/mpeg",
+            "xi-api-key": api_key,
+            "Content-Type": "application/json"
+        }
+        
+        def send():
+            response = ElevenLabsClient.post(url_with_params, headers=headers, json=payload)
+            response.raise_for_status()
+            return load_audio_from_response(response.content, output_format)
+        
+        flight_key = RequestCoalescer.make_key(url_with_params, payload, api_key)
+        return RequestCoalescer.run(flight_key, send, characters=len(payload["text"]))
+    
+    @classmethod
+    def stream_speech(cls, api_key, voice_id, payload, output_format, on_chunk=None):
+        """
+        Stream one text-to-speech request, decoding audio as it arrives
+        
+        Raw PCM formats are decoded chunk by chunk and passed to on_chunk and
+        stream_listeners; MP3 is downloaded as a stream and decoded at the end.
+        
+        Returns:
+            Tuple of (waveform, sample_rate); raises RequestException on failure
+        """
+        url_with_params = f"/v1/text-to-speech/{voice_id}/stream?output_format={output_format}"
+        headers = {
+            "Accept": "audio/mpeg",
+            "xi-api-key": api_key,
+            "Content-Type": "application/json"
+        }
+        listeners = ([on_chunk] if on_chunk else []) + list(cls.stream_listeners)
+        
+        def send():
+            start_time = time.perf_counter()
+            stats = {"time_to_first_byte": None, "time_to_first_sample": None, "bytes": 0}
+            sample_rate = pcm_sample_rate(output_format)
+            decoder = PCMStreamDecoder(sample_rate) if sample_rate else None
+            encoded = bytearray()
+            
+            response = ElevenLabsClient.post(url_with_params, headers=headers, json=payload, stream=True)
+            with response:
+                response.raise_for_status()
+                for data in response.iter_content(chunk_size=STREAM_CHUNK_BYTES):
+                    if not data:
+                        continue
+                    if stats["time_to_first_byte"] is None:
+                        stats["time_to_first_byte"] = time.perf_counter() - start_time
+                    stats["bytes"] += len(data)
+                    if decoder is None:
+                        encoded += data
+                        continue
+                    samples = decoder.feed(data)
+                    if samples.numel():
+                        if stats["time_to_first_sample"] is None:
+                            stats["time_to_first_sample"] = time.perf_counter() - start_time
+                        for listener in listeners:
+                            listener(samples, sample_rate)
+            
+            if decoder is not None:
+                waveform = decoder.waveform()
+            else:
+                waveform, sample_rate = load_audio_from_response(bytes(encoded))
+                stats["time_to_first_sample"] = time.perf_counter() - start_time
+                for listener in listeners:
+                    listener(waveform.view(-1), sample_rate)
+            stats["total_time"] = time.perf_counter() - start_time
+            cls.last_stream_stats = stats
+            
+            ttfb = stats["time_to_first_byte"]
+            ttfs = stats["time_to_first_sample"]
+            print(f"✓ Streamed {stats['bytes']} bytes: first byte "
+                  f"{f'{ttfb * 1000:.0f} ms' if ttfb is not None else 'n/a'}, first decoded sample "
+                  f"{f'{ttfs * 1000:.0f} ms' if ttfs is not None else 'n/a'}, total {stats['total_time']:.2f}s")
+            return waveform, sample_rate
+        
+        flight_key = RequestCoalescer.make_key(url_with_params, payload, api_key)
+        return RequestCoalescer.run(flight_key, send, characters=len(payload["text"]))
+    
+    def _generate_chunked(self, api_key, voice_id, payload, output_format, chunks, max_parallel):
+        """Synthesize chunks concurrently and stitch them into one waveform"""
+        use_context = payload["model_id"] not in MODELS_WITHOUT_TEXT_CONTEXT
+        
+        def synthesize(index):
+            chunk_payload = dict(payload, text=chunks[index])
+            # Neighbouring text keeps prosody continuous across chunk boundaries
+            if use_context and index > 0:
+                chunk_payload["previous_text"] = chunks[index - 1][-CONTEXT_CHARS:]
+            if use_context and index < len(chunks) - 1:
+                chunk_payload["next_text"] = chunks[index + 1][:CONTEXT_CHARS]
+            return self.request_speech(api_key, voice_id, chunk_payload, output_format)
+        
+        start_time = time.perf_counter()
+        results = map_concurrently(synthesize, range(len(chunks)), limit=max_parallel)
+        
+        sample_rate = results[0][1]
+        waveforms = [
+            waveform if rate == sample_rate else torchaudio.functional.resample(waveform, rate, sample_rate)
+            for waveform, rate in results
+        ]
+        waveform = concat_with_crossfade(waveforms, sample_rate)
+        print(f"✓ Synthesized {len(chunks)} chunks in {time.perf_counter() - start_time:.2f}s")
+        return waveform, sample_rate
+    
     @classmethod
     def IS_CHANGED(cls, api_key, text, voice, model, stability, similarity_boost, style, use_speaker_boost, 
-                   input_text=None, language_code="auto", output_format="mp3_44100_128", seed=-1):
+                   input_text=None, language_code="auto", output_format="mp3_44100_128", seed=-1,
+                   use_cache=True, chunking="auto", chunk_chars=2000, max_parallel=4, streaming=False,
+                   target_sample_rate=24000):
         # Always regenerate
         return (api_key, text, voice, model, stability, similarity_boost, style, use_speaker_boost, 
-                input_text, language_code, output_format, seed)
+                input_text, language_code, output_format, seed, use_cache, chunking, chunk_chars, max_parallel,
+                streaming, target_sample_rate)
 
@@ -0,0 +1,241 @@
+"""Batch Text-to-Speech Node - Render many lines concurrently"""
+
+import json
+import time
+import requests
+import torch
+from ..utils.api import fetch_models_from_api, map_concurrently
+from ..utils.audio import (create_empty_audio, encode_audio_blob, decode_audio_blob, resolve_output_format,
+                           resample)
+from .tts import ElevenLabsTTS
+
+
+# Per-line keys that override the node's defaults in JSON input
+LINE_SETTINGS = ("voice", "model", "stability", "similarity_boost", "style", "use_speaker_boost",
+                 "language_code", "seed")
+
+
+class ElevenLabsBatchTTS:
+    """
+    Batch Text-to-Speech - Voice a list of lines in one node execution
+    Lines are rendered concurrently and returned as a batch or a single timeline
+    """
+    
+    @classmethod
+    def INPUT_TYPES(cls):
+        models = fetch_models_from_api()
+        
+        return {
+            "required": {
+                "api_key": ("STRING", {
+                    "multiline": False,
+                    "default": ""
+                }),
+                "lines": ("STRING", {
+                    "multiline": True,
+                    "default": "Welcome to the game.\nPress start to begin.",
+                    "tooltip": "One line per row, or a JSON list of strings / objects like "
+                               "{\"text\": \"...\", \"voice\": \"Name (voice_id)\", \"stability\": 0.4}"
+                }),
+                "voice": ("STRING", {
+                    "multiline": False,
+                    "default": "",
+                    "tooltip": "Default voice for lines without their own"
+                }),
+                "model": (models,),
+                "stability": ("FLOAT", {
+                    "default": 0.5,
+                    "min": 0.0,
+                    "max": 1.0,
+                    "step": 0.01
+                }),
+                "similarity_boost": ("FLOAT", {
+                    "default": 0.75,
+                    "min": 0.0,
+                    "max": 1.0,
+                    "step": 0.01
+                }),
+                "style": ("FLOAT", {
+                    "default": 0.0,
+                    "min": 0.0,
+                    "max": 1.0,
+                    "step": 0.01
+                }),
+                "use_speaker_boost": ("BOOLEAN", {
+                    "default": True,
+                }),
+            },
+            "optional": {
+                "language_code": (["auto", "en", "es", "fr", "de", "it", "pt", "pl", "ru", "nl", "ja", "zh", "ko", "hi", "ar"], {
+                    "default": "auto"
+                }),
+                "output_format": (["mp3_44100_128", "mp3_44100_192", "pcm_16000", "pcm_22050", "pcm_24000", "pcm_44100", "auto"], {
+                    "default": "mp3_44100_128",
+                    "tooltip": "auto: raw PCM at target_sample_rate, skipping MP3 decode entirely"
+                }),
+                "seed": ("INT", {
+                    "default": -1,
+                    "min": -1,
+                    "max": 4294967295
+                }),
+                "output_mode": (["batch", "timeline"], {
+                    "default": "batch",
+                    "tooltip": "batch: padded [N, C, T] audio plus per-line lengths. timeline: all lines joined in order"
+                }),
+                "gap_seconds": ("FLOAT", {
+                    "default": 0.3,
+                    "min": 0.0,
+                    "max": 10.0,
+                    "step": 0.05,
+                    "tooltip": "Silence between lines in timeline mode"
+                }),
+                "max_parallel": ("INT", {
+                    "default": 4,
+                    "min": 1,
+                    "max": 16,
+                    "tooltip": "Lines synthesized at once"
+                }),
+                "use_cache": ("BOOLEAN", {
+                    "default": True,
+                    "tooltip": "Reuse previously generated audio for identical lines (shared with the TTS node)"
+                }),
+                # Appended last: saved workflows restore widget values by position
+                "target_sample_rate": ("INT", {
+                    "default": 24000,
+                    "min": 16000,
+                    "max": 44100,
+                    "tooltip": "Sample rate the workflow needs when output_format is auto"
+                }),
+            }
+        }
+    
+    RETURN_TYPES = ("AUDIO", "STRING")
+    RETURN_NAMES = ("audio", "lengths")
+    FUNCTION = "generate_batch"
+    CATEGORY = "ElevenLabs"
+    
+    @staticmethod
+    def parse_lines(lines):
+        """
+        Parse newline-separated text or a JSON list into line dicts
+        
+        Returns:
+            List of dicts with at least a "text" key
+        """
+        stripped = lines.strip()
+        if stripped.startswith("["):
+            items = json.loads(stripped)
+            parsed = []
+            for item in items:
+                if isinstance(item, str):
+                    item = {"text": item}
+                if item.get("text", "").strip():
+                    parsed.append(item)
+            return parsed
+        return [{"text": line.strip()} for line in stripped.splitlines() if line.strip()]
+    
+    def generate_batch(self, api_key, lines, voice, model, stability, similarity_boost, style, use_speaker_boost,
+                       language_code="auto", output_format="mp3_44100_128", seed=-1, output_mode="batch",
+                       gap_seconds=0.3, max_parallel=4, use_cache=True, target_sample_rate=24000):
+        """Synthesize every line concurrently"""
+        output_format = resolve_output_format(output_format, target_sample_rate)
+        
+        try:
+            items = self.parse_lines(lines)
+        except (ValueError, AttributeError) as e:
+            print(f"❌ Error parsing batch lines: {str(e)}")
+            return (create_empty_audio(), "[]")
+        
+        if not items:
+            print("❌ Error: No lines provided for batch TTS")
+            return (create_empty_audio(), "[]")
+        
+        defaults = {
+            "voice": voice,
+            "model": model,
+            "stability": stability,
+            "similarity_boost": similarity_boost,
+            "style": style,
+            "use_speaker_boost": use_speaker_boost,
+            "language_code": language_code,
+            "seed": seed,
+        }
+        total_chars = sum(len(item["text"]) for item in items)
+        
+        print("\n" + "="*60)
+        print("🎤 ELEVENLABS BATCH TTS REQUEST")
+        print("="*60)
+        print(f"Lines: {len(items)} ({total_chars} chars)")
+        print(f"Default voice: {voice}")
+        print(f"Model: {model}")
+        print(f"Output format: {output_format}")
+        print(f"Output mode: {output_mode}, {max_parallel} in parallel")
+        print("="*60 + "\n")
+        
+        def synthesize(index):
+            item = items[index]
+            settings = {key: item.get(key, defaults[key]) for key in LINE_SETTINGS}
+            voice_id = settings["voice"].split("(")[-1].strip(")")
+            payload = ElevenLabsTTS.build_payload(
+                item["text"], settings["model"], settings["stability"], settings["similarity_boost"],
+                settings["style"], settings["use_speaker_boost"], settings["language_code"], settings["seed"]
+            )
+            cache_key = ElevenLabsTTS.cache_key(voice_id, payload, output_format)
+            if use_cache:
+                blob = ElevenLabsTTS.result_cache.get(cache_key)
+                if blob is not None:
+                    return decode_audio_blob(blob)
+            try:
+                waveform, sample_rate = ElevenLabsTTS.request_speech(api_key, voice_id, payload, output_format)
+            except requests.exceptions.RequestException as e:
+                print(f"❌ Line {index + 1} failed: {str(e)}")
+                if hasattr(e, 'response') and e.response is not None:
+                    print(f"   Status Code: {e.response.status_code}")
+                    print(f"   Response: {e.response.text[:200]}")
+                return None
+            if use_cache:
+                ElevenLabsTTS.result_cache.put(cache_key, encode_audio_blob(waveform, sample_rate))
+            return waveform, sample_rate
+        
+        start_time = time.perf_counter()
+        results = map_concurrently(synthesize, range(len(items)), limit=max_parallel)
+        elapsed = time.perf_counter() - start_time
+        
+        succeeded = [result for result in results if result is not None]
+        if not succeeded:
+            print("❌ Error: every line in the batch failed")
+            return (create_empty_audio(), "[]")
+        
+        sample_rate = succeeded[0][1]
+        channels = max(waveform.shape[1] for waveform, _ in succeeded)
+        waveforms = []
+        for result in results:
+            if result is None:
+                waveforms.append(torch.zeros(1, channels, 0))
+                continue
+            waveform, rate = result
+            if rate != sample_rate:
+                waveform = resample(waveform, rate, sample_rate)
+            waveforms.append(waveform)
+        lengths = [waveform.shape[2] for waveform in waveforms]
+        
+        if output_mode == "timeline":
+            gap = int(gap_seconds * sample_rate)
+            total = sum(lengths) + gap * (len(waveforms) - 1)
+            output = torch.zeros(1, channels, total, dtype=torch.float32)
+            position = 0
+            for waveform, length in zip(waveforms, lengths):
+                output[:, :, position:position + length] = waveform
+                position += length + gap
+        else:
+            output = torch.zeros(len(waveforms), channels, max(max(lengths), 1), dtype=torch.float32)
+            for index, (waveform, length) in enumerate(zip(waveforms, lengths)):
+                output[index, :, :length] = waveform[0]
+        
+        failed = len(results) - len(succeeded)
+        print(f"✓ Batch complete: {len(succeeded)}/{len(items)} lines in {elapsed:.2f}s "
+              f"({len(items) / elapsed:.1f} lines/sec, {total_chars / elapsed:.0f} chars/sec)")
+        if failed:
+            print(f"⚠️ {failed} line(s) failed and were left silent")
+        print(f"  Audio: {sample_rate}Hz, {tuple(output.shape)}")
+        return ({"waveform": output, "sample_rate": sample_rate}, json.dumps(lengths))
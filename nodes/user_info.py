@@ -1,6 +1,8 @@
 """User Info Node - Check account status and credits"""
 
 import requests
+from ..utils.api import ElevenLabsClient
+from ..utils.scheduler import RequestScheduler
 
 
 class ElevenLabsUserInfo:
@@ -33,20 +35,22 @@ class ElevenLabsUserInfo:
         if not api_key or api_key.strip() == "":
             return ("Error: API key is required",)
         
-        url = "https://api.elevenlabs.io/v1/user"
+        url = "/v1/user"
         headers = {
             "xi-api-key": api_key,
             "Accept": "application/json"
         }
         
         try:
-            response = requests.get(url, headers=headers, timeout=10)
+            response = ElevenLabsClient.get(url, headers=headers)
             response.raise_for_status()
             
             data = response.json()
             
             # Extract key information
             subscription = data.get("subscription", {})
+            if subscription.get("tier"):
+                RequestScheduler.set_tier(api_key, subscription["tier"])
             
             info_text = f"""
 ╔══════════════════════════════════════╗
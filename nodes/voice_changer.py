@@ -2,9 +2,13 @@
 
 import requests
 import json  # <-- ADDED
-from ..utils.api import fetch_voices_from_api
-from ..utils.audio import tensor_to_wav_buffer, load_audio_from_response, create_empty_audio
+from ..utils.api import ElevenLabsClient, fetch_voices_from_api
+from ..utils.audio import (UPLOAD_CODECS, UPLOAD_CONDITIONING, condition_upload, encode_upload,
+                           load_audio_from_response, create_empty_audio)
+from ..utils.segmented import process_in_windows
+from ..utils.vad import TRIM_MODES, trim_silence
 from ..utils.cache import ElevenLabsCache
+from ..utils.fingerprint import input_fingerprint
 
 
 class ElevenLabsVoiceChanger:
@@ -13,8 +17,6 @@ class ElevenLabsVoiceChanger:
     Also known as Speech-to-Speech (STS)
     """
     
-    _last_api_key = None
-    
     @classmethod
     def INPUT_TYPES(cls):
         voices = fetch_voices_from_api()
@@ -57,6 +59,36 @@ class ElevenLabsVoiceChanger:
                 "use_speaker_boost": ("BOOLEAN", {
                     "default": True,
                 }),
+                "upload_format": (list(UPLOAD_CODECS), {
+                    "default": "flac",
+                    "tooltip": "Codec used to upload the audio; lossless FLAC keeps the source intact"
+                }),
+                "upload_conditioning": (list(UPLOAD_CONDITIONING), {
+                    "default": "auto",
+                    "tooltip": "Sample rate/channels uploaded; auto matches what this endpoint needs"
+                }),
+                "silence_trimming": (list(TRIM_MODES), {
+                    "default": "off",
+                    "tooltip": "Skip silence before upload; the result is re-padded to the original length"
+                }),
+                "segment_seconds": ("INT", {
+                    "default": 120,
+                    "min": 0,
+                    "max": 1800,
+                    "tooltip": "Longer audio is processed as overlapping segments in parallel and crossfaded back together (0 = never split)"
+                }),
+                "max_parallel": ("INT", {
+                    "default": 4,
+                    "min": 1,
+                    "max": 16,
+                    "tooltip": "Segments processed at once"
+                }),
+                "regenerate": ("INT", {
+                    "default": 0,
+                    "min": 0,
+                    "max": 4294967295,
+                    "tooltip": "Change to call the API again even though no other input changed"
+                }),
             }
         }
     
@@ -65,24 +97,27 @@ class ElevenLabsVoiceChanger:
     CATEGORY = "ElevenLabs"
     
     def change_voice(self, api_key, audio, target_voice, model, stability, similarity_boost, 
-                    style=0.0, use_speaker_boost=True):
+                    style=0.0, use_speaker_boost=True, upload_format="flac", upload_conditioning="auto",
+                    silence_trimming="off", segment_seconds=120, max_parallel=4, regenerate=0):
         """Transform voice in audio to target voice"""
         
-        # Auto-refresh voices when API key changes
-        if api_key and api_key != self.__class__._last_api_key:
-            print(f"\n🔄 New API key detected - Auto-refreshing voices...")
-            ElevenLabsCache.force_refresh_voices()
-            fetch_voices_from_api(api_key, force_refresh=True)
-            self.__class__._last_api_key = api_key
-            print("✓ Voices refreshed! Reload node to see updates\n")
+        # Voices are cached per API key, so switching keys only fetches on first use
+        if api_key:
+            ElevenLabsCache.set_active_tenant(api_key)
+            if not ElevenLabsCache.is_voices_cache_valid(api_key):
+                print(f"\n🔄 New API key detected - Auto-refreshing voices...")
+                fetch_voices_from_api(api_key)
+                print("✓ Voices refreshed! Reload node to see updates\n")
         
         voice_id = target_voice.split("(")[-1].strip(")")
         voice_name = target_voice.split("(")[0].strip()
         
-        url = f"https://api.elevenlabs.io/v1/speech-to-speech/{voice_id}"
+        url = f"/v1/speech-to-speech/{voice_id}"
         
-        # Convert audio tensor to WAV
-        wav_buffer = tensor_to_wav_buffer(audio["waveform"], audio["sample_rate"])
+        # Downmix/resample to what the endpoint needs; segments are encoded in the upload codec when sent
+        upload_waveform, upload_rate = condition_upload(audio["waveform"], audio["sample_rate"],
+                                                        "speech_to_speech", upload_conditioning)
+        upload_waveform, silence_map = trim_silence(upload_waveform, upload_rate, silence_trimming)
         
         headers = {
             "xi-api-key": api_key,
@@ -99,9 +134,14 @@ class ElevenLabsVoiceChanger:
             })
         }
         
-        files = {
-            "audio": ("input.wav", wav_buffer, "audio/wav")
-        }
+        def convert(segment, rate):
+            files = {
+                "audio": encode_upload(segment, rate, upload_format)
+            }
+            # Note: speech-to-speech uses multipart/form-data, not JSON
+            response = ElevenLabsClient.post_multipart(url, headers=headers, data=data, files=files)
+            response.raise_for_status()
+            return load_audio_from_response(response.content)
         
         # Log request details
         print("\n" + "="*60)
@@ -114,11 +154,9 @@ class ElevenLabsVoiceChanger:
         print("="*60 + "\n")
         
         try:
-            # Note: speech-to-speech uses multipart/form-data, not JSON
-            response = requests.post(url, headers=headers, data=data, files=files, timeout=60)
-            response.raise_for_status()
-            
-            waveform, sample_rate = load_audio_from_response(response.content)
+            waveform, sample_rate = process_in_windows(upload_waveform, upload_rate, convert, segment_seconds,
+                                                       max_parallel=max_parallel)
+            waveform = silence_map.restore(waveform, sample_rate)
             
             print(f"✓ Changed voice to {voice_name}")
             print(f"  Audio: {sample_rate}Hz, {waveform.shape}")
@@ -136,4 +174,5 @@ class ElevenLabsVoiceChanger:
     
     @classmethod
     def IS_CHANGED(cls, **kwargs):
-        return float("nan")
+        # Identical inputs reuse ComfyUI's cached output instead of re-billing the API
+        return input_fingerprint(kwargs)
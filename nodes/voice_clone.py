@@ -1,12 +1,24 @@
 """Voice Clone Node - Clone voices from audio samples"""
 
+import os
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from ..utils.api import ElevenLabsClient
+from ..utils.audio import (UPLOAD_CODECS, UPLOAD_CONDITIONING, audio_fingerprint, condition_upload, encode_uploads,
+                           ensure_3d_tensor, normalize_loudness)
+from ..utils.fingerprint import input_fingerprint
+from ..utils.vad import TRIM_MODES, trim_silence
+from ..utils.voice_registry import VoiceCloneRegistry
+
+
+# Extra sample inputs besides audio_sample (which may itself be a batch)
+EXTRA_SAMPLE_INPUTS = ("audio_sample_2", "audio_sample_3", "audio_sample_4", "audio_sample_5")
 
 
 class ElevenLabsVoiceClone:
     """
     Voice Clone - Create a cloned voice from audio samples
-    Requires multiple audio samples for best results (Instant Voice Cloning)
+    Takes several samples (batched or on extra inputs) for best results (Instant Voice Cloning)
     """
     
     @classmethod
@@ -28,30 +40,140 @@ class ElevenLabsVoiceClone:
                 }),
             },
             "optional": {
+                **{name: ("AUDIO",) for name in EXTRA_SAMPLE_INPUTS},
                 "labels": ("STRING", {
                     "multiline": True,
                     "default": "accent: american, age: young, gender: female"
                 }),
+                "upload_format": (list(UPLOAD_CODECS), {
+                    "default": "flac",
+                    "tooltip": "Codec used to upload the sample; lossless FLAC keeps clone quality"
+                }),
+                "upload_conditioning": (list(UPLOAD_CONDITIONING), {
+                    "default": "auto",
+                    "tooltip": "Sample rate/channels uploaded; auto matches what this endpoint needs"
+                }),
+                "silence_trimming": (list(TRIM_MODES), {
+                    "default": "edges",
+                    "tooltip": "Trim silence from each sample before upload; compress also shortens long pauses"
+                }),
+                "normalize": ("BOOLEAN", {
+                    "default": True,
+                    "tooltip": "Bring every sample to the same loudness (-20 dBFS RMS, peaks below -1 dBFS)"
+                }),
+                "max_parallel": ("INT", {
+                    "default": 4,
+                    "min": 1,
+                    "max": 16,
+                    "tooltip": "Samples preprocessed and encoded at once"
+                }),
+                "force_clone": ("BOOLEAN", {
+                    "default": False,
+                    "tooltip": "Create a new voice even if these samples, name and labels were already cloned"
+                }),
+                "regenerate": ("INT", {
+                    "default": 0,
+                    "min": 0,
+                    "max": 4294967295,
+                    "tooltip": "Change to call the API again even though no other input changed"
+                }),
             }
         }
     
-    RETURN_TYPES = ("STRING",)
-    RETURN_NAMES = ("status",)
+    RETURN_TYPES = ("STRING", "STRING")
+    RETURN_NAMES = ("status", "voice_id")
     FUNCTION = "clone_voice"
     CATEGORY = "ElevenLabs"
     OUTPUT_NODE = True
     
-    def clone_voice(self, api_key, voice_name, audio_sample, voice_description, labels=""):
+    @staticmethod
+    def collect_samples(audio_sample, extra_samples):
+        """
+        Split the sample inputs into individual clips
+        
+        Every batch item of every connected AUDIO input is a separate sample.
+        
+        Returns:
+            List of (waveform [1, channels, samples], sample_rate)
+        """
+        samples = []
+        for audio in [audio_sample, *extra_samples]:
+            if audio is None:
+                continue
+            waveform = ensure_3d_tensor(audio["waveform"])
+            samples.extend((waveform[index:index + 1], audio["sample_rate"]) for index in range(waveform.shape[0]))
+        return samples
+    
+    @staticmethod
+    def prepare_sample(waveform, sample_rate, upload_conditioning, silence_trimming, normalize):
+        """
+        Condition, trim and normalize one sample for cloning
+        
+        Returns:
+            Tuple of (waveform, sample_rate, hash before normalization, hash of the result)
+        """
+        waveform, sample_rate = condition_upload(waveform, sample_rate, "voice_clone", upload_conditioning)
+        waveform, _ = trim_silence(waveform, sample_rate, silence_trimming)
+        # Hashed before normalizing, so takes that differ only in gain are not mistaken for duplicates
+        source_fingerprint = audio_fingerprint(waveform, sample_rate)
+        if not normalize:
+            return waveform, sample_rate, source_fingerprint, source_fingerprint
+        waveform = normalize_loudness(waveform)
+        return waveform, sample_rate, source_fingerprint, audio_fingerprint(waveform, sample_rate)
+    
+    def clone_voice(self, api_key, voice_name, audio_sample, voice_description, labels="", upload_format="flac",
+                    upload_conditioning="auto", silence_trimming="edges", normalize=True, max_parallel=4,
+                    force_clone=False, regenerate=0, **extra_samples):
         """
-        Clone a voice from audio sample
+        Clone a voice from one or more audio samples
         This creates an instant voice clone (IVC)
+        
+        Samples are preprocessed and encoded on worker threads, exact duplicates
+        are dropped, and all of them are sent in one streamed multipart request.
+        Identical samples, name and labels return the voice created before
+        (see VoiceCloneRegistry) unless force_clone is set, so re-running a
+        workflow does not use up another voice slot.
         """
-        from ..utils.audio import tensor_to_wav_buffer
+        url = "/v1/voices/add"
+        
+        # Downmix/resample to what the endpoint needs, trim and normalize, several samples at once
+        samples = self.collect_samples(audio_sample, [extra_samples.get(name) for name in EXTRA_SAMPLE_INPUTS])
+        with ThreadPoolExecutor(max_workers=max(1, min(max_parallel, len(samples)))) as executor:
+            prepared = list(executor.map(
+                lambda sample: self.prepare_sample(sample[0], sample[1], upload_conditioning, silence_trimming,
+                                                   normalize),
+                samples
+            ))
+        
+        # The same take connected twice would only weigh it twice in the clone
+        unique = {}
+        for waveform, sample_rate, source_fingerprint, fingerprint in prepared:
+            unique.setdefault(source_fingerprint, (waveform, sample_rate, fingerprint))
+        if len(unique) < len(prepared):
+            print(f"⚠️ Dropped {len(prepared) - len(unique)} duplicate sample(s)")
+        print(f"✓ Prepared {len(unique)} sample(s), "
+              f"{sum(waveform.shape[-1] / rate for waveform, rate, _ in unique.values()):.1f}s of audio")
         
-        url = "https://api.elevenlabs.io/v1/voices/add"
+        # Parse labels if provided
+        labels_dict = {}
+        if labels and labels.strip():
+            for label in labels.split(","):
+                if ":" in label:
+                    key, value = label.split(":", 1)
+                    labels_dict[key.strip()] = value.strip()
         
-        # Convert audio tensor to WAV
-        wav_buffer = tensor_to_wav_buffer(audio_sample["waveform"], audio_sample["sample_rate"])
+        registry_key = VoiceCloneRegistry.make_key(api_key, [fingerprint for _, _, fingerprint in unique.values()],
+                                                   voice_name, labels_dict)
+        if not force_clone:
+            existing = VoiceCloneRegistry.lookup(registry_key, api_key)
+            if existing is not None:
+                print(f"✓ Reusing cloned voice: {existing['name']} ({existing['voice_id']}) - "
+                      f"enable force_clone to create a new one")
+                return (f"✓ Voice already cloned from these samples\n\nVoice Name: {existing['name']}\n"
+                        f"Voice ID: {existing['voice_id']}\n\nEnable force_clone to create a new voice.",
+                        existing["voice_id"])
+        
+        uploads = encode_uploads([(waveform, rate) for waveform, rate, _ in unique.values()], upload_format, max_workers=max_parallel, label="Sample")
         
         headers = {
             "xi-api-key": api_key,
@@ -63,27 +185,23 @@ class ElevenLabsVoiceClone:
             "description": voice_description,
         }
         
-        # Parse labels if provided
-        if labels and labels.strip():
-            labels_dict = {}
-            for label in labels.split(","):
-                if ":" in label:
-                    key, value = label.split(":", 1)
-                    labels_dict[key.strip()] = value.strip()
-            if labels_dict:
-                data["labels"] = str(labels_dict)
+        if labels_dict:
+            data["labels"] = str(labels_dict)
         
-        # Files - the API expects files with specific field names
-        files = {
-            "files": ("sample.wav", wav_buffer, "audio/wav")
-        }
+        # Files - every sample is a "files" part of the same streamed request
+        files = [
+            ("files", (f"sample_{index + 1}{os.path.splitext(filename)[1]}", content, mime_type))
+            for index, (filename, content, mime_type) in enumerate(uploads)
+        ]
         
         try:
-            response = requests.post(url, headers=headers, data=data, files=files, timeout=60)
+            response = ElevenLabsClient.post_multipart(url, headers=headers, data=data, files=files)
             response.raise_for_status()
             
             result = response.json()
             voice_id = result.get("voice_id")
+            if voice_id:
+                VoiceCloneRegistry.register(registry_key, api_key, voice_id, voice_name)
             
             status_msg = f"""
 ╔══════════════════════════════════════╗
@@ -104,7 +222,7 @@ see your new cloned voice in the voice list.
 """
             
             print(f"✓ Voice cloned: {voice_name} ({voice_id})")
-            return (status_msg,)
+            return (status_msg, voice_id or "")
             
         except requests.exceptions.RequestException as e:
             error_msg = f"""
@@ -122,9 +240,10 @@ Check your ElevenLabs subscription and audio quality.
             if hasattr(e, 'response') and e.response is not None:
                 print(f"Response: {e.response.text}")
                 error_msg += f"\n\nAPI Response: {e.response.text}"
-            return (error_msg,)
+            return (error_msg, "")
     
     @classmethod
     def IS_CHANGED(cls, **kwargs):
-        return float("nan")
+        # Identical inputs reuse ComfyUI's cached output instead of re-billing the API
+        return input_fingerprint(kwargs)
 
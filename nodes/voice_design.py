@@ -1,8 +1,9 @@
 """Voice Design Node - Create custom voices from descriptions"""
 
 import requests
-from ..utils.api import fetch_models_from_api
+from ..utils.api import ElevenLabsClient, fetch_models_from_api
 from ..utils.audio import load_audio_from_response, create_empty_audio
+from ..utils.fingerprint import input_fingerprint
 
 
 class ElevenLabsVoiceDesign:
@@ -42,6 +43,14 @@ class ElevenLabsVoiceDesign:
                     "max": 2.0,
                     "step": 0.1
                 }),
+            },
+            "optional": {
+                "regenerate": ("INT", {
+                    "default": 0,
+                    "min": 0,
+                    "max": 4294967295,
+                    "tooltip": "Change to call the API again even though no other input changed"
+                }),
             }
         }
     
@@ -50,12 +59,13 @@ class ElevenLabsVoiceDesign:
     FUNCTION = "design_voice"
     CATEGORY = "ElevenLabs"
     
-    def design_voice(self, api_key, voice_description, sample_text, gender, age, accent, accent_strength):
+    def design_voice(self, api_key, voice_description, sample_text, gender, age, accent, accent_strength,
+                     regenerate=0):
         """
         Design a custom voice from description
         Note: This uses the voice generation preview endpoint
         """
-        url = "https://api.elevenlabs.io/v1/voice-generation/generate-voice"
+        url = "/v1/voice-generation/generate-voice"
         
         headers = {
             "xi-api-key": api_key,
@@ -73,7 +83,7 @@ class ElevenLabsVoiceDesign:
         }
         
         try:
-            response = requests.post(url, headers=headers, json=payload, timeout=60)
+            response = ElevenLabsClient.post(url, headers=headers, json=payload)
             response.raise_for_status()
             
             waveform, sample_rate = load_audio_from_response(response.content)
@@ -115,5 +125,6 @@ samples or the ElevenLabs web interface.
     
     @classmethod
     def IS_CHANGED(cls, **kwargs):
-        return float("nan")
+        # Identical inputs reuse ComfyUI's cached output instead of re-billing the API
+        return input_fingerprint(kwargs)
 
@@ -1,7 +1,12 @@
 """Voice Isolator Node"""
 
 import requests
-from ..utils.audio import tensor_to_wav_buffer, load_audio_from_response
+from ..utils.api import ElevenLabsClient
+from ..utils.audio import (UPLOAD_CODECS, UPLOAD_CONDITIONING, condition_upload, encode_upload,
+                           load_audio_from_response)
+from ..utils.segmented import process_in_windows
+from ..utils.vad import TRIM_MODES, trim_silence
+from ..utils.fingerprint import input_fingerprint
 
 
 class ElevenLabsVoiceIsolator:
@@ -16,6 +21,38 @@ class ElevenLabsVoiceIsolator:
                     "default": ""
                 }),
                 "audio": ("AUDIO",),
+            },
+            "optional": {
+                "upload_format": (list(UPLOAD_CODECS), {
+                    "default": "flac",
+                    "tooltip": "Codec used to upload the audio; lossless FLAC keeps the source intact"
+                }),
+                "upload_conditioning": (list(UPLOAD_CONDITIONING), {
+                    "default": "auto",
+                    "tooltip": "Sample rate/channels uploaded; auto matches what this endpoint needs"
+                }),
+                "silence_trimming": (list(TRIM_MODES), {
+                    "default": "off",
+                    "tooltip": "Skip silence before upload; the result is re-padded to the original length"
+                }),
+                "segment_seconds": ("INT", {
+                    "default": 300,
+                    "min": 0,
+                    "max": 1800,
+                    "tooltip": "Longer audio is processed as overlapping segments in parallel and crossfaded back together (0 = never split)"
+                }),
+                "max_parallel": ("INT", {
+                    "default": 4,
+                    "min": 1,
+                    "max": 16,
+                    "tooltip": "Segments processed at once"
+                }),
+                "regenerate": ("INT", {
+                    "default": 0,
+                    "min": 0,
+                    "max": 4294967295,
+                    "tooltip": "Change to call the API again even though no other input changed"
+                }),
             }
         }
     
@@ -23,26 +60,32 @@ class ElevenLabsVoiceIsolator:
     FUNCTION = "isolate_voice"
     CATEGORY = "ElevenLabs"
     
-    def isolate_voice(self, api_key, audio):
+    def isolate_voice(self, api_key, audio, upload_format="flac", upload_conditioning="auto",
+                      silence_trimming="off", segment_seconds=300, max_parallel=4, regenerate=0):
         """Remove background noise and isolate voice"""
-        url = "https://api.elevenlabs.io/v1/audio-isolation"
+        url = "/v1/audio-isolation"
         
-        # Convert audio tensor to WAV
-        wav_buffer = tensor_to_wav_buffer(audio["waveform"], audio["sample_rate"])
+        # Downmix/resample to what the endpoint needs; segments are encoded in the upload codec when sent
+        upload_waveform, upload_rate = condition_upload(audio["waveform"], audio["sample_rate"],
+                                                        "audio_isolation", upload_conditioning)
+        upload_waveform, silence_map = trim_silence(upload_waveform, upload_rate, silence_trimming)
         
         headers = {
             "xi-api-key": api_key
         }
         
-        files = {
-            "audio": ("audio.wav", wav_buffer, "audio/wav")
-        }
+        def isolate(segment, rate):
+            files = {
+                "audio": encode_upload(segment, rate, upload_format)
+            }
+            response = ElevenLabsClient.post_multipart(url, headers=headers, files=files)
+            response.raise_for_status()
+            return load_audio_from_response(response.content)
         
         try:
-            response = requests.post(url, headers=headers, files=files, timeout=60)
-            response.raise_for_status()
-            
-            waveform, sample_rate = load_audio_from_response(response.content)
+            waveform, sample_rate = process_in_windows(upload_waveform, upload_rate, isolate, segment_seconds,
+                                                       max_parallel=max_parallel)
+            waveform = silence_map.restore(waveform, sample_rate)
             
             print(f"✓ Isolated voice from audio")
             return ({"waveform": waveform, "sample_rate": sample_rate},)
@@ -55,5 +98,6 @@ class ElevenLabsVoiceIsolator:
     
     @classmethod
     def IS_CHANGED(cls, **kwargs):
-        return float("nan")
+        # Identical inputs reuse ComfyUI's cached output instead of re-billing the API
+        return input_fingerprint(kwargs)
 
@@ -1,7 +1,7 @@
 """Voice Manager Node - Manage and inspect voices"""
 
 import requests
-from ..utils.api import fetch_voices_from_api
+from ..utils.api import ElevenLabsClient, fetch_voices_from_api
 
 
 class ElevenLabsVoiceManager:
@@ -35,9 +35,9 @@ class ElevenLabsVoiceManager:
         voice_id = voice.split("(")[-1].strip(")")
         
         if action == "Get Info":
-            url = f"https://api.elevenlabs.io/v1/voices/{voice_id}"
+            url = f"/v1/voices/{voice_id}"
         elif action == "Get Settings":
-            url = f"https://api.elevenlabs.io/v1/voices/{voice_id}/settings"
+            url = f"/v1/voices/{voice_id}/settings"
         else:
             return ("Unknown action",)
         
@@ -47,7 +47,7 @@ class ElevenLabsVoiceManager:
         }
         
         try:
-            response = requests.get(url, headers=headers, timeout=10)
+            response = ElevenLabsClient.get(url, headers=headers)
             response.raise_for_status()
             
             data = response.json()
@@ -1,11 +1,18 @@
 """Utility modules for ElevenLabs ComfyUI nodes"""
 
 from .cache import ElevenLabsCache
-from .api import fetch_voices_from_api, fetch_models_from_api
+from .api import (
+    ElevenLabsClient,
+    fetch_voices_from_api,
+    fetch_models_from_api,
+)
+from .scheduler import RequestScheduler
 from .audio import ensure_3d_tensor, tensor_to_wav_buffer
 
 __all__ = [
     "ElevenLabsCache",
+    "ElevenLabsClient",
+    "RequestScheduler",
     "fetch_voices_from_api",
     "fetch_models_from_api",
     "ensure_3d_tensor",
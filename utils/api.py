@@ -1,30 +1,371 @@
 """API helper functions for ElevenLabs"""
 
+import os
+import tempfile
+import threading
+import time
+import uuid
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from .cache import ElevenLabsCache
+from .scheduler import IDEMPOTENT_METHODS, RequestScheduler
 
 
-def fetch_voices_from_api(api_key=None, force_refresh=False):
+API_BASE_URL = os.environ.get("ELEVENLABS_API_BASE_URL", "https://api.elevenlabs.io")
+
+
+class ElevenLabsClient:
     """
-    Fetch voices from ElevenLabs API with caching
+    Process-wide HTTP client shared by all nodes
     
-    Args:
-        api_key: Optional API key for authenticated requests
-        force_refresh: Force bypass cache
+    Wraps a single keep-alive requests.Session so repeated calls reuse
+    pooled TCP/TLS connections instead of paying a fresh handshake each time.
+    """
+    
+    base_url = API_BASE_URL
+    pool_size = int(os.environ.get("ELEVENLABS_POOL_SIZE", "16"))
+    default_timeout = 30
+    # Longest matching path prefix wins
+    endpoint_timeouts = {
+        "/v1/voices": 10,
+        "/v1/voices/add": 60,
+        "/v1/user": 10,
+        "/v1/history": 10,
+        "/v1/text-to-speech": 30,
+        "/v1/speech-to-speech": 60,
+        "/v1/speech-to-text": 60,
+        "/v1/sound-generation": 60,
+        "/v1/audio-isolation": 60,
+        "/v1/music-generation": 60,
+        "/v1/voice-generation": 60,
+        "/v1/dubbing": 120,
+        "/v1/dubbing/": 10,
+    }
+    
+    _session = None
+    _lock = threading.Lock()
+    _requests_sent = 0
+    
+    @classmethod
+    def configure(cls, base_url=None, pool_size=None, endpoint_timeouts=None):
+        """
+        Update client settings; the pool is rebuilt on next use
         
+        Args:
+            base_url: API base URL (e.g. a proxy or mock server)
+            pool_size: Max keep-alive connections per host
+            endpoint_timeouts: Dict of path prefix -> timeout seconds to merge in
+        """
+        with cls._lock:
+            if base_url is not None:
+                cls.base_url = base_url.rstrip("/")
+            if pool_size is not None:
+                cls.pool_size = pool_size
+            if endpoint_timeouts:
+                cls.endpoint_timeouts = {**cls.endpoint_timeouts, **endpoint_timeouts}
+            if cls._session is not None:
+                cls._session.close()
+                cls._session = None
+    
+    @classmethod
+    def get_session(cls):
+        """Get (lazily creating) the shared pooled session"""
+        session = cls._session
+        if session is not None:
+            return session
+        with cls._lock:
+            if cls._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=cls.pool_size,
+                                      pool_maxsize=cls.pool_size,
+                                      pool_block=False)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                cls._session = session
+            return cls._session
+    
+    @classmethod
+    def build_url(cls, path):
+        """Resolve an endpoint path against the base URL"""
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        return f"{cls.base_url}{path}"
+    
+    @classmethod
+    def timeout_for(cls, path):
+        """Get the configured timeout for an endpoint path"""
+        if path.startswith(cls.base_url):
+            path = path[len(cls.base_url):]
+        path = path.split("?", 1)[0]
+        best = None
+        for prefix in cls.endpoint_timeouts:
+            if path.startswith(prefix) and (best is None or len(prefix) > len(best)):
+                best = prefix
+        return cls.endpoint_timeouts[best] if best else cls.default_timeout
+    
+    @classmethod
+    def request(cls, method, path, timeout=None, idempotent=None, max_retries=None, **kwargs):
+        """
+        Send a request through the shared connection pool
+        
+        Requests are scheduled per API key by RequestScheduler (rate limit,
+        tier concurrency, retries on 429/5xx).
+        
+        Args:
+            method: HTTP method (GET, POST, etc.)
+            path: Endpoint path (e.g. "/v1/voices") or absolute URL
+            timeout: Override the per-endpoint timeout
+            idempotent: Allow retries after 5xx/lost responses; defaults to True for GET/DELETE, False for POST
+            max_retries: Override the scheduler's retry budget
+            **kwargs: Additional arguments for requests
+            
+        Returns:
+            requests.Response (errors are raised, not swallowed)
+        """
+        if timeout is None:
+            timeout = cls.timeout_for(path)
+        api_key = (kwargs.get("headers") or {}).get("xi-api-key")
+        url = cls.build_url(path)
+        
+        def send(**request_kwargs):
+            with cls._lock:
+                cls._requests_sent += 1
+            return cls.get_session().request(method, url, timeout=timeout, **request_kwargs)
+        
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        return RequestScheduler.run(api_key, send, idempotent=idempotent, max_retries=max_retries, **kwargs)
+    
+    @classmethod
+    def get(cls, path, **kwargs):
+        return cls.request("GET", path, **kwargs)
+    
+    @classmethod
+    def post(cls, path, **kwargs):
+        return cls.request("POST", path, **kwargs)
+    
+    @classmethod
+    def download(cls, method, path, dest=None, chunk_size=1 << 20, **kwargs):
+        """
+        Stream a response body to a file instead of holding it in memory
+        
+        The body is written chunk by chunk to a temporary file next to dest,
+        which is renamed into place once complete.
+        
+        Args:
+            method: HTTP method
+            path: Endpoint path or absolute URL
+            dest: File to write; a new temporary file if omitted (the caller deletes it)
+            chunk_size: Bytes read from the socket at a time
+            **kwargs: Additional arguments for requests
+            
+        Returns:
+            Path of the downloaded file (HTTP errors are raised)
+        """
+        if dest is None:
+            fd, tmp_path = tempfile.mkstemp(prefix="elevenlabs_", suffix=".download")
+        else:
+            os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dest) or ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                with cls.request(method, path, stream=True, **kwargs) as response:
+                    if not response.ok:
+                        # Read the (small) error body so callers can still print e.response.text
+                        response.content
+                    response.raise_for_status()
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        f.write(chunk)
+            if dest is None:
+                return tmp_path
+            os.replace(tmp_path, dest)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return dest
+    
+    @classmethod
+    def post_multipart(cls, path, headers=None, data=None, files=None, **kwargs):
+        """
+        POST multipart/form-data as a streamed body
+        
+        Takes the same data/files arguments as requests, but file contents may
+        also be sized iterables like WavStream, which are encoded as they are sent.
+        """
+        body = MultipartStream(fields=data, files=files)
+        request_headers = dict(headers or {})
+        request_headers["Content-Type"] = body.content_type
+        return cls.request("POST", path, headers=request_headers, data=body, **kwargs)
+    
+    @classmethod
+    def get_stats(cls):
+        """
+        Report connection pool usage
+        
+        Returns:
+            Dict with requests, pool hits (reused connections) and misses (new connections)
+        """
+        with cls._lock:
+            requests_sent = cls._requests_sent
+            session = cls._session
+        misses = 0
+        pooled_requests = 0
+        if session is not None:
+            seen = set()
+            for adapter in session.adapters.values():
+                if id(adapter) in seen:
+                    continue
+                seen.add(id(adapter))
+                pools = adapter.poolmanager.pools
+                for key in list(pools.keys()):
+                    pool = pools.get(key)
+                    if pool is None:
+                        continue
+                    misses += pool.num_connections
+                    pooled_requests += pool.num_requests
+        return {
+            "requests": requests_sent,
+            "pool_hits": max(pooled_requests - misses, 0),
+            "pool_misses": misses,
+            "pool_size": cls.pool_size,
+            "base_url": cls.base_url,
+        }
+
+
+class MultipartStream:
+    """
+    multipart/form-data body generated on the fly
+    
+    File contents may be bytes, file objects or sized iterables of bytes
+    (e.g. WavStream), so large uploads are sent in chunks instead of being
+    materialized. len() is exact, so requests sends a Content-Length, and
+    every iteration starts over so retries resend the full body.
+    """
+    
+    def __init__(self, fields=None, files=None, chunk_size=1 << 16):
+        self.boundary = uuid.uuid4().hex
+        self.chunk_size = chunk_size
+        self.parts = []
+        for name, value in (fields or {}).items():
+            for item in (value if isinstance(value, (list, tuple)) else [value]):
+                header = (f"--{self.boundary}\r\n"
+                          f"Content-Disposition: form-data; name=\"{name}\"\r\n\r\n")
+                self.parts.append((header.encode("utf-8"), str(item).encode("utf-8")))
+        file_items = files.items() if isinstance(files, dict) else (files or [])
+        for name, (filename, content, content_type) in file_items:
+            header = (f"--{self.boundary}\r\n"
+                      f"Content-Disposition: form-data; name=\"{name}\"; filename=\"{filename}\"\r\n"
+                      f"Content-Type: {content_type}\r\n\r\n")
+            self.parts.append((header.encode("utf-8"), content))
+        self.closing = f"--{self.boundary}--\r\n".encode("utf-8")
+    
+    @property
+    def content_type(self):
+        return f"multipart/form-data; boundary={self.boundary}"
+    
+    @staticmethod
+    def _content_length(content):
+        if isinstance(content, (bytes, bytearray)):
+            return len(content)
+        if hasattr(content, "getbuffer"):
+            return content.getbuffer().nbytes
+        if hasattr(content, "seek"):
+            position = content.seek(0, os.SEEK_END)
+            content.seek(0)
+            return position
+        return len(content)
+    
+    def __len__(self):
+        total = len(self.closing)
+        for header, content in self.parts:
+            total += len(header) + self._content_length(content) + 2
+        return total
+    
+    def __iter__(self):
+        for header, content in self.parts:
+            yield header
+            if isinstance(content, (bytes, bytearray)):
+                yield content
+            elif hasattr(content, "read"):
+                content.seek(0)
+                while True:
+                    block = content.read(self.chunk_size)
+                    if not block:
+                        break
+                    yield block
+            else:
+                yield from content
+            yield b"\r\n"
+        yield self.closing
+
+
+# Maximum characters per TTS request
+# Source: https://elevenlabs.io/docs/models
+MODEL_CHAR_LIMITS = {
+    "eleven_v3": 3000,
+    "eleven_multilingual_v2": 10000,
+    "eleven_turbo_v2_5": 40000,
+    "eleven_turbo_v2": 40000,
+    "eleven_flash_v2_5": 40000,
+    "eleven_flash_v2": 30000,
+    "eleven_monolingual_v1": 10000,
+    "eleven_multilingual_v1": 10000,
+}
+DEFAULT_CHAR_LIMIT = 5000
+
+
+def map_concurrently(fn, items, limit=None):
+    """
+    Call a blocking function on every item concurrently, bounded by limit
+    
+    Each call gets its own worker pool (at most limit threads, or the
+    connection pool size), so nested fan-outs cannot starve each other; the
+    first exception is raised once all calls have finished.
+    
     Returns:
-        List of voice strings in format "Name (voice_id)"
+        List of results in input order
+    """
+    items = list(items)
+    if not items:
+        return []
+    workers = min(limit or ElevenLabsClient.pool_size, len(items))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="elevenlabs-io") as executor:
+        futures = [executor.submit(fn, item) for item in items]
+    results = []
+    for future in futures:
+        error = future.exception()
+        if error is not None:
+            raise error
+        results.append(future.result())
+    return results
+
+
+# Connect timeout for catalog fetches a node definition is waiting on
+CATALOG_CONNECT_TIMEOUT = 3.05
+
+
+def _download_voices(api_key, foreground=False):
     """
-    if not force_refresh and ElevenLabsCache.is_voices_cache_valid():
-        return ElevenLabsCache.get_voices()
+    Fetch the voice list from the API and store it in the cache
     
-    url = "https://api.elevenlabs.io/v1/voices"
+    A foreground fetch blocks INPUT_TYPES (and ComfyUI's /object_info), so it
+    gets one attempt with a short connect timeout; callers fall back to the
+    snapshot or an error entry straight away.
+    """
     headers = {}
     if api_key:
         headers["xi-api-key"] = api_key
     
+    kwargs = {}
+    if foreground:
+        kwargs = {
+            "max_retries": 0,
+            "timeout": (CATALOG_CONNECT_TIMEOUT, ElevenLabsClient.timeout_for("/v1/voices")),
+        }
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = ElevenLabsClient.get("/v1/voices", headers=headers, **kwargs)
         response.raise_for_status()
         voices = response.json()["voices"]
         voice_list = [f"{voice['name']} ({voice['voice_id']})" for voice in voices]
@@ -32,7 +373,7 @@ def fetch_voices_from_api(api_key=None, force_refresh=False):
         if not voice_list:
             voice_list = ["No voices available"]
         
-        ElevenLabsCache.set_voices(voice_list)
+        ElevenLabsCache.set_voices(voice_list, api_key)
         print(f"✓ Fetched {len(voice_list)} voices from ElevenLabs")
         return voice_list
         
@@ -42,11 +383,85 @@ def fetch_voices_from_api(api_key=None, force_refresh=False):
             error_msg += f"\n   Status Code: {e.response.status_code}"
             error_msg += f"\n   Response: {e.response.text[:200]}"
         print(error_msg)
+        return None
+
+
+def _refresh_voices(api_key):
+    """
+    Refresh one tenant's voices, de-duplicating concurrent refreshes
+    
+    Callers that lose the race wait for the in-flight refresh instead of
+    issuing their own request.
+    
+    Returns:
+        The fresh voice list, or None if the refresh failed
+    """
+    claimed, done = ElevenLabsCache.begin_refresh("voices", api_key)
+    if not claimed:
+        joined_at = time.time()
+        done.wait(ElevenLabsClient.timeout_for("/v1/voices") + 1)
+        age = ElevenLabsCache.get_age("voices", api_key)
+        if age is None or age > time.time() - joined_at:
+            # The refresh we joined did not store a new list
+            return None
+        return ElevenLabsCache.get_voices(api_key)
+    
+    start_time = time.perf_counter()
+    try:
+        return _download_voices(api_key, foreground=True)
+    finally:
+        ElevenLabsCache.end_refresh("voices", api_key, time.perf_counter() - start_time)
+
+
+def _refresh_voices_in_background(api_key):
+    """Start a background refresh unless one is already running for this tenant"""
+    claimed, _ = ElevenLabsCache.begin_refresh("voices", api_key)
+    if not claimed:
+        return
+    
+    def run():
+        start_time = time.perf_counter()
+        try:
+            _download_voices(api_key)
+        finally:
+            ElevenLabsCache.end_refresh("voices", api_key, time.perf_counter() - start_time)
+    
+    threading.Thread(target=run, name="elevenlabs-voice-refresh", daemon=True).start()
+
+
+def fetch_voices_from_api(api_key=None, force_refresh=False, fallback=True):
+    """
+    Fetch voices from ElevenLabs API with caching
+    
+    An expired list is returned immediately while a background thread
+    revalidates it (stale-while-revalidate), so only a cold cache or a
+    forced refresh waits on the network.
+    
+    Args:
+        api_key: Optional API key for authenticated requests
+        force_refresh: Force bypass cache
+        fallback: On a failed fetch, return the cached list (or an error entry) instead of None
         
-        cached = ElevenLabsCache.get_voices()
-        if cached is None:
-            return ["Error: Cannot fetch voices - check API key"]
-        return cached
+    Returns:
+        List of voice strings in format "Name (voice_id)", or None if the fetch failed and fallback is off
+    """
+    api_key = ElevenLabsCache.resolve_api_key(api_key)
+    if not force_refresh:
+        cached = ElevenLabsCache.get_voices(api_key)
+        if cached is not None:
+            if (not ElevenLabsCache.is_voices_cache_valid(api_key)
+                    and ElevenLabsCache.can_refresh(api_key)):
+                _refresh_voices_in_background(api_key)
+            return cached
+    
+    voice_list = _refresh_voices(api_key)
+    if voice_list is not None or not fallback:
+        return voice_list
+    
+    cached = ElevenLabsCache.get_voices(api_key)
+    if cached is None:
+        return ["Error: Cannot fetch voices - check API key"]
+    return cached
 
 
 def fetch_models_from_api(api_key=None, force_refresh=False):
@@ -63,6 +478,7 @@ def fetch_models_from_api(api_key=None, force_refresh=False):
     Returns:
         List of model IDs
     """
+    api_key = ElevenLabsCache.resolve_api_key(api_key)
     # Known models from ElevenLabs documentation
     # Source: https://elevenlabs.io/docs/models
     known_models = [
@@ -80,13 +496,13 @@ def fetch_models_from_api(api_key=None, force_refresh=False):
         "eleven_multilingual_v1"            # DEPRECATED (but still works)
     ]
     
-    if not force_refresh and ElevenLabsCache.is_models_cache_valid():
-        return ElevenLabsCache.get_models()
+    if not force_refresh and ElevenLabsCache.is_models_cache_valid(api_key):
+        return ElevenLabsCache.get_models(api_key)
     
     # ElevenLabs doesn't have a models list endpoint
     # Models are specified directly in TTS requests
     # Use the known models from documentation
-    ElevenLabsCache.set_models(known_models)
+    ElevenLabsCache.set_models(known_models, api_key)
     
     if force_refresh and api_key:
         print(f"✓ Using {len(known_models)} models from ElevenLabs documentation")
@@ -100,7 +516,7 @@ def make_api_request(method, url, headers, **kwargs):
     
     Args:
         method: HTTP method (GET, POST, etc.)
-        url: API endpoint URL
+        url: API endpoint path or absolute URL
         headers: Request headers
         **kwargs: Additional arguments for requests
         
@@ -108,7 +524,7 @@ def make_api_request(method, url, headers, **kwargs):
         Response object or None if error
     """
     try:
-        response = requests.request(method, url, headers=headers, **kwargs)
+        response = ElevenLabsClient.request(method, url, headers=headers, **kwargs)
         response.raise_for_status()
         return response
     except requests.exceptions.Timeout:
@@ -116,7 +532,7 @@ def make_api_request(method, url, headers, **kwargs):
         print(f"   The request took too long to complete")
         return None
     except requests.exceptions.HTTPError as e:
-        status_code = e.response.status_code if e.response else "Unknown"
+        status_code = e.response.status_code if e.response is not None else "Unknown"
         print(f"❌ API HTTP Error {status_code}: {url}")
         if e.response is not None:
             print(f"   Response: {e.response.text[:500]}")
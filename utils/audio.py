@@ -1,8 +1,21 @@
 """Audio tensor utilities for ComfyUI"""
 
+import functools
+import hashlib
 import io
+import os
+import struct
+import tempfile
+import time
+import warnings
+import wave
 import torch
 import torchaudio
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Raw PCM sample rates offered by the TTS endpoint
+PCM_SAMPLE_RATES = (16000, 22050, 24000, 44100)
 
 
 def ensure_3d_tensor(tensor):
@@ -27,6 +40,136 @@ def ensure_3d_tensor(tensor):
     return tensor
 
 
+# WAV encoding: (format tag, bytes per sample, torch dtype)
+WAV_SAMPLE_FORMATS = {
+    "int16": (1, 2, torch.int16),
+    "float32": (3, 4, torch.float32),
+}
+WAV_HEADER_BYTES = 44
+# Samples per channel converted at a time, bounding temporary memory
+WAV_BLOCK_SAMPLES = 1 << 18
+
+
+def _wav_header(num_samples, channels, sample_rate, sample_format):
+    """Build a 44-byte RIFF/WAVE header"""
+    format_tag, sample_bytes, _ = WAV_SAMPLE_FORMATS[sample_format]
+    data_bytes = num_samples * channels * sample_bytes
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_bytes, b"WAVE",
+        b"fmt ", 16, format_tag, channels, sample_rate,
+        sample_rate * channels * sample_bytes, channels * sample_bytes, sample_bytes * 8,
+        b"data", data_bytes,
+    )
+
+
+def _prepare_for_wav(waveform):
+    """Get a [channels, samples] float tensor on CPU from ComfyUI audio"""
+    waveform = ensure_3d_tensor(waveform)[0].detach()
+    return waveform.cpu().float()
+
+
+def _encode_wav_block(block, out, sample_format):
+    """Convert a [channels, n] float block into interleaved samples written to out ([n, channels])"""
+    interleaved = block.t()
+    if sample_format == "int16":
+        scaled = torch.clamp(interleaved, -1.0, 1.0)
+        scaled.mul_(32767.0).round_()
+        out.copy_(scaled)
+    else:
+        out.copy_(interleaved)
+
+
+def encode_wav(waveform, sample_rate, sample_format="int16"):
+    """
+    Encode audio as WAV into a single preallocated buffer
+    
+    The header and interleaved samples are written straight into the
+    BytesIO's own storage, converting block by block, so the signal is
+    never copied through an intermediate file or backend.
+    
+    Args:
+        waveform: Audio tensor (ComfyUI format)
+        sample_rate: Sample rate of audio
+        sample_format: "int16" (clipped) or "float32"
+        
+    Returns:
+        BytesIO buffer containing WAV data, positioned at 0
+    """
+    waveform = _prepare_for_wav(waveform)
+    channels, num_samples = waveform.shape
+    _, sample_bytes, dtype = WAV_SAMPLE_FORMATS[sample_format]
+    total = WAV_HEADER_BYTES + num_samples * channels * sample_bytes
+    
+    wav_buffer = io.BytesIO()
+    wav_buffer.seek(total - 1)
+    wav_buffer.write(b"\0")
+    view = wav_buffer.getbuffer()
+    view[:WAV_HEADER_BYTES] = _wav_header(num_samples, channels, sample_rate, sample_format)
+    if num_samples:
+        samples = torch.frombuffer(view, dtype=dtype, offset=WAV_HEADER_BYTES).view(num_samples, channels)
+        for start in range(0, num_samples, WAV_BLOCK_SAMPLES):
+            end = min(start + WAV_BLOCK_SAMPLES, num_samples)
+            _encode_wav_block(waveform[:, start:end], samples[start:end], sample_format)
+        del samples
+    view.release()
+    wav_buffer.seek(0)
+    return wav_buffer
+
+
+class WavStream:
+    """
+    Lazily encoded WAV file for streaming uploads
+    
+    Iterating yields the header and then one encoded block at a time, so the
+    full file never exists in memory; len() gives the exact encoded size.
+    Each iteration starts over, so a retried request resends everything.
+    """
+    
+    def __init__(self, waveform, sample_rate, sample_format="int16", block_samples=WAV_BLOCK_SAMPLES):
+        self.waveform = _prepare_for_wav(waveform)
+        self.sample_rate = sample_rate
+        self.sample_format = sample_format
+        self.block_samples = block_samples
+    
+    def __len__(self):
+        channels, num_samples = self.waveform.shape
+        return WAV_HEADER_BYTES + num_samples * channels * WAV_SAMPLE_FORMATS[self.sample_format][1]
+    
+    def __iter__(self):
+        channels, num_samples = self.waveform.shape
+        _, sample_bytes, dtype = WAV_SAMPLE_FORMATS[self.sample_format]
+        yield _wav_header(num_samples, channels, self.sample_rate, self.sample_format)
+        for start in range(0, num_samples, self.block_samples):
+            end = min(start + self.block_samples, num_samples)
+            block = bytearray((end - start) * channels * sample_bytes)
+            out = torch.frombuffer(block, dtype=dtype).view(end - start, channels)
+            _encode_wav_block(self.waveform[:, start:end], out, self.sample_format)
+            del out
+            yield block
+
+
+def audio_fingerprint(waveform, sample_rate):
+    """
+    Fast content hash of audio for cache keys
+    
+    Samples are quantized to 16-bit PCM block by block (the same vectorized
+    path as WAV encoding) and fed to SHA-256 incrementally, so float noise
+    below 16-bit precision doesn't change the key and no full copy is made.
+    
+    Args:
+        waveform: Audio tensor (3D)
+        sample_rate: Sample rate of audio
+        
+    Returns:
+        Hex digest covering samples, channel count, length and sample rate
+    """
+    digest = hashlib.sha256()
+    for block in WavStream(waveform, sample_rate):
+        digest.update(block)
+    return digest.hexdigest()
+
+
 def tensor_to_wav_buffer(waveform, sample_rate):
     """
     Convert audio tensor to WAV buffer
@@ -38,24 +181,294 @@ def tensor_to_wav_buffer(waveform, sample_rate):
     Returns:
         BytesIO buffer containing WAV data
     """
-    waveform = ensure_3d_tensor(waveform)
-    wav_buffer = io.BytesIO()
-    # ComfyUI format is [batch, channels, samples], torchaudio needs [channels, samples]
-    torchaudio.save(wav_buffer, waveform.squeeze(0), sample_rate, format="wav")
-    wav_buffer.seek(0)
-    return wav_buffer
+    return encode_wav(waveform, sample_rate)
+
+
+# Upload conditioning per endpoint: (max sample rate, channel count); None keeps the source's
+UPLOAD_TARGETS = {
+    "speech_to_text": (16000, 1),
+    "speech_to_speech": (44100, 1),
+    "audio_isolation": (44100, None),
+    "dubbing": (44100, None),
+    "voice_clone": (44100, 1),
+}
+
+# Node-selectable overrides of UPLOAD_TARGETS; "auto" uses the endpoint's target
+UPLOAD_CONDITIONING = {
+    "auto": None,
+    "original": (None, None),
+    "16 kHz mono": (16000, 1),
+    "24 kHz mono": (24000, 1),
+    "44.1 kHz mono": (44100, 1),
+    "44.1 kHz stereo": (44100, 2),
+}
+
+
+@functools.lru_cache(maxsize=32)
+def _get_resampler(orig_freq, new_freq):
+    """Build (once per rate pair) a resampler with its precomputed windowed-sinc kernel"""
+    return torchaudio.transforms.Resample(orig_freq, new_freq)
+
+
+def resample(waveform, orig_freq, new_freq):
+    """
+    Resample audio, reusing the filter kernel for each (orig, new) rate pair
+    
+    Args:
+        waveform: Float audio tensor on CPU, time in the last dimension
+        orig_freq: Source sample rate
+        new_freq: Target sample rate
+        
+    Returns:
+        Resampled tensor
+    """
+    if int(orig_freq) == int(new_freq):
+        return waveform
+    return _get_resampler(int(orig_freq), int(new_freq))(waveform.float())
+
+
+def condition_upload(waveform, sample_rate, endpoint, conditioning="auto"):
+    """
+    Downmix and downsample audio to what an endpoint needs before uploading it
+    
+    Sample rates are only ever lowered, and channels only ever reduced.
+    
+    Args:
+        waveform: Audio tensor (3D)
+        sample_rate: Sample rate of audio
+        endpoint: Key of UPLOAD_TARGETS
+        conditioning: Key of UPLOAD_CONDITIONING
+        
+    Returns:
+        Tuple of (waveform [1, channels, samples], sample_rate)
+    """
+    target = UPLOAD_CONDITIONING.get(conditioning) or UPLOAD_TARGETS.get(endpoint, (None, None))
+    max_rate, max_channels = target
+    waveform = _prepare_for_wav(waveform).unsqueeze(0)
+    channels = waveform.shape[1]
+    new_rate = min(sample_rate, max_rate) if max_rate else sample_rate
+    new_channels = min(channels, max_channels) if max_channels else channels
+    if new_rate == sample_rate and new_channels == channels:
+        return waveform, sample_rate
+    
+    if new_channels < channels:
+        if new_channels == 1:
+            waveform = waveform.mean(dim=1, keepdim=True)
+        else:
+            waveform = waveform[:, :new_channels]
+    waveform = resample(waveform, sample_rate, new_rate)
+    ratio = (sample_rate * channels) / (new_rate * new_channels)
+    print(f"🎚️ Upload conditioning: {sample_rate}Hz x{channels} → {new_rate}Hz x{new_channels} "
+          f"({ratio:.1f}x less audio data)")
+    return waveform, new_rate
+
+
+def normalize_loudness(waveform, target_dbfs=-20.0, peak_dbfs=-1.0):
+    """
+    Bring each batch item to a common RMS loudness, without clipping
+    
+    Gains are computed for all items at once; an item's gain is lowered if
+    it would push its peak above peak_dbfs, and silent items are left as is.
+    
+    Args:
+        waveform: Audio tensor [batch, channels, samples]
+        target_dbfs: RMS level to reach
+        peak_dbfs: Highest allowed sample peak
+        
+    Returns:
+        Normalized float32 tensor of the same shape
+    """
+    waveform = ensure_3d_tensor(waveform).float()
+    flat = waveform.reshape(waveform.shape[0], -1)
+    rms = flat.pow(2).mean(dim=1).sqrt()
+    peak = flat.abs().amax(dim=1)
+    gain = torch.minimum(10.0 ** (target_dbfs / 20.0) / rms.clamp_min(1e-8),
+                         10.0 ** (peak_dbfs / 20.0) / peak.clamp_min(1e-8))
+    gain = torch.where(rms > 1e-6, gain, torch.ones_like(gain))
+    return waveform * gain.view(-1, 1, 1)
+
+
+# Upload codecs: (encoder format, file extension, MIME type, bit rate for lossy codecs)
+UPLOAD_CODECS = {
+    "wav": ("wav", "wav", "audio/wav", None),
+    "flac": ("flac", "flac", "audio/flac", None),
+    "mp3": ("mp3", "mp3", "audio/mpeg", 128000),
+    "opus": ("opus", "ogg", "audio/ogg", 32000),
+}
+
+_codec_warnings = set()
+
+
+def _encode_compressed(samples, sample_rate, codec):
+    """Encode [channels, samples] float audio with FFmpeg-backed torchcodec or torchaudio"""
+    encoder_format, _, _, bit_rate = UPLOAD_CODECS[codec]
+    try:
+        from torchcodec.encoders import AudioEncoder
+    except (ImportError, OSError, RuntimeError):
+        AudioEncoder = None
+    
+    if AudioEncoder is not None:
+        encoded = AudioEncoder(samples, sample_rate=sample_rate).to_tensor(encoder_format, bit_rate=bit_rate)
+        data = bytearray(encoded.numel())
+        torch.frombuffer(data, dtype=torch.uint8).copy_(encoded)
+        return bytes(data)
+    
+    # torchaudio < 2.9 encodes to file objects through its sox/ffmpeg backends
+    buffer = io.BytesIO()
+    torchaudio.save(buffer, samples, sample_rate, format=encoder_format)
+    return buffer.getvalue()
+
+
+def encode_upload(waveform, sample_rate, codec="wav", label="Upload"):
+    """
+    Encode audio for a multipart upload
+    
+    WAV is streamed (see WavStream); FLAC, MP3 and Opus are encoded up front and
+    fall back to WAV if this install has no encoder for them.
+    
+    Args:
+        waveform: Audio tensor (3D)
+        sample_rate: Sample rate of audio
+        codec: Key of UPLOAD_CODECS
+        label: Prefix for the log line
+        
+    Returns:
+        Tuple of (filename, content, mime_type), as used for files in ElevenLabsClient.post_multipart
+    """
+    samples = _prepare_for_wav(waveform)
+    wav = WavStream(samples, sample_rate)
+    if codec == "wav" or codec not in UPLOAD_CODECS:
+        return "audio.wav", wav, "audio/wav"
+    
+    start_time = time.perf_counter()
+    try:
+        data = _encode_compressed(samples.clamp(-1.0, 1.0), sample_rate, codec)
+    except Exception as e:
+        if codec not in _codec_warnings:
+            _codec_warnings.add(codec)
+            print(f"⚠️ {codec.upper()} upload encoding unavailable ({str(e).splitlines()[0][:120]}), sending WAV instead")
+        return "audio.wav", wav, "audio/wav"
+    elapsed = time.perf_counter() - start_time
+    
+    _, extension, mime_type, _ = UPLOAD_CODECS[codec]
+    saved = len(wav) - len(data)
+    print(f"📦 {label}: {codec.upper()} {len(data) / 1e6:.2f} MB in {elapsed:.2f}s "
+          f"(saved {saved / 1e6:.2f} MB, {100 * saved / len(wav):.0f}% vs WAV)")
+    return f"audio.{extension}", data, mime_type
+
+
+def encode_uploads(clips, codec="wav", max_workers=4, label="Clip"):
+    """
+    Encode several clips or segments for upload in parallel
+    
+    FFmpeg encoders release the GIL, so clips are encoded on worker threads.
+    
+    Args:
+        clips: List of (waveform, sample_rate)
+        codec: Key of UPLOAD_CODECS
+        max_workers: Clips encoded at once
+        label: Log prefix, numbered per clip
+        
+    Returns:
+        List of (filename, content, mime_type) in input order
+    """
+    if len(clips) <= 1 or max_workers <= 1:
+        return [encode_upload(waveform, rate, codec, f"{label} {index + 1}")
+                for index, (waveform, rate) in enumerate(clips)]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(clips))) as executor:
+        futures = [executor.submit(encode_upload, waveform, rate, codec, f"{label} {index + 1}")
+                   for index, (waveform, rate) in enumerate(clips)]
+        return [future.result() for future in futures]
+
+
+def pcm_sample_rate(output_format):
+    """
+    Get the sample rate of a raw PCM output format
+    
+    Args:
+        output_format: ElevenLabs output format (e.g. "pcm_24000")
+        
+    Returns:
+        Sample rate in Hz, or None for container formats like MP3
+    """
+    if not output_format.startswith("pcm_"):
+        return None
+    return int(output_format.split("_")[1])
+
+
+def _pcm16_view(data, count=-1):
+    """
+    View read-only PCM bytes as int16 without copying them
+    
+    The view is only read from, never written through, so torch's
+    non-writable buffer warning is silenced here (and only here).
+    """
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="The given buffer is not writable", category=UserWarning)
+        return torch.frombuffer(data, dtype=torch.int16, count=count)
+
+
+def decode_pcm16(data, sample_rate):
+    """
+    Decode headerless 16-bit little-endian mono PCM without intermediate copies
+    
+    The int16 samples are viewed in place with frombuffer and scaled in one
+    vectorized op into the float32 output, the only allocation made.
+    
+    Args:
+        data: Raw PCM bytes
+        sample_rate: Sample rate of the PCM stream
+        
+    Returns:
+        Tuple of (waveform [1, 1, samples], sample_rate)
+    """
+    count = len(data) // 2
+    if count == 0:
+        return torch.zeros(1, 1, 1, dtype=torch.float32), sample_rate
+    samples = _pcm16_view(data, count)
+    waveform = torch.empty(count, dtype=torch.float32)
+    torch.mul(samples, 1.0 / 32768.0, out=waveform)
+    return waveform.view(1, 1, -1), sample_rate
 
 
-def load_audio_from_response(response_content):
+def resolve_output_format(output_format, target_sample_rate=24000):
+    """
+    Resolve the "auto" output format to raw PCM at the rate the workflow needs
+    
+    Picks the lowest offered PCM rate at or above target_sample_rate (or the
+    highest available), so no MP3 decode or upsampling is needed downstream.
+    
+    Args:
+        output_format: Requested format, or "auto"
+        target_sample_rate: Sample rate the workflow needs
+        
+    Returns:
+        Concrete ElevenLabs output format
+    """
+    if output_format != "auto":
+        return output_format
+    for rate in PCM_SAMPLE_RATES:
+        if rate >= target_sample_rate:
+            return f"pcm_{rate}"
+    return f"pcm_{PCM_SAMPLE_RATES[-1]}"
+
+
+def load_audio_from_response(response_content, output_format=None):
     """
     Load audio from API response content
     
     Args:
         response_content: Raw audio bytes from API response
+        output_format: Requested output format; pcm_* takes the raw PCM fast path
         
     Returns:
         Tuple of (waveform, sample_rate) in ComfyUI format
     """
+    if output_format:
+        sample_rate = pcm_sample_rate(output_format)
+        if sample_rate:
+            return decode_pcm16(response_content, sample_rate)
+    
     audio_content = io.BytesIO(response_content)
     waveform, sample_rate = torchaudio.load(audio_content)
     
@@ -73,6 +486,266 @@ def load_audio_from_response(response_content):
     return waveform, sample_rate
 
 
+# Seconds of audio decoded per step when loading from a file
+DECODE_CHUNK_SECONDS = 30
+
+
+def allocate_waveform(channels, num_samples, memory_map=False, batch=1):
+    """
+    Allocate a zeroed float32 waveform [batch, channels, samples]
+    
+    With memory_map the samples live in a temporary file mapped into memory,
+    so the OS can page them out instead of holding them in RAM. The file is
+    unlinked right away and vanishes with the mapping. Windows cannot unlink
+    a mapped file, so it would be left behind in the temp directory: there
+    memory_map is ignored and the waveform is allocated in RAM.
+    
+    Args:
+        channels: Number of channels
+        num_samples: Samples per channel
+        memory_map: Back the tensor with a temporary file
+        batch: Number of batch items
+        
+    Returns:
+        Float32 tensor [batch, channels, num_samples]
+    """
+    if not memory_map or os.name == "nt":
+        return torch.zeros(batch, channels, num_samples, dtype=torch.float32)
+    size = batch * channels * num_samples
+    fd, path = tempfile.mkstemp(prefix="elevenlabs_", suffix=".f32")
+    os.close(fd)
+    try:
+        buffer = torch.from_file(path, shared=True, size=max(size, 1), dtype=torch.float32)
+    finally:
+        # The mapping outlives the name, so nothing is left on disk once the tensor is freed
+        os.remove(path)
+    return buffer[:size].view(batch, channels, num_samples)
+
+
+def _load_pcm16_file(path, sample_rate, memory_map):
+    """Decode a headerless 16-bit mono PCM file chunk by chunk"""
+    num_samples = os.path.getsize(path) // 2
+    output = allocate_waveform(1, max(num_samples, 1), memory_map)
+    chunk = DECODE_CHUNK_SECONDS * sample_rate
+    with open(path, "rb") as f:
+        for start in range(0, num_samples, chunk):
+            data = f.read(min(chunk, num_samples - start) * 2)
+            samples = _pcm16_view(data)
+            torch.mul(samples, 1.0 / 32768.0, out=output[0, 0, start:start + samples.numel()])
+    return output, sample_rate
+
+
+def _load_wav_file(path, memory_map):
+    """Decode a 16/32-bit PCM WAV file chunk by chunk, or return None for other encodings"""
+    try:
+        reader = wave.open(path, "rb")
+    except (wave.Error, EOFError):
+        return None
+    with reader:
+        sample_width = reader.getsampwidth()
+        if sample_width not in (2, 4):
+            return None
+        dtype = torch.int16 if sample_width == 2 else torch.int32
+        channels = reader.getnchannels()
+        sample_rate = reader.getframerate()
+        num_samples = reader.getnframes()
+        output = allocate_waveform(channels, max(num_samples, 1), memory_map)
+        chunk = DECODE_CHUNK_SECONDS * sample_rate
+        for start in range(0, num_samples, chunk):
+            frames = torch.frombuffer(bytearray(reader.readframes(chunk)), dtype=dtype).view(-1, channels)
+            if frames.shape[0] == 0:
+                break
+            output[0, :, start:start + frames.shape[0]] = frames.t() / float(torch.iinfo(dtype).max + 1)
+    return output, sample_rate
+
+
+def _load_compressed_file(path, memory_map):
+    """Decode MP3 and other compressed files, chunk by chunk where torchcodec is available"""
+    try:
+        from torchcodec.decoders import AudioDecoder
+        decoder = AudioDecoder(path)
+    except (ImportError, OSError, RuntimeError):
+        decoder = None
+    
+    duration = decoder.metadata.duration_seconds_from_header if decoder is not None else None
+    if not duration:
+        # No decoder or no duration to size the output from: decode in one piece
+        if decoder is not None:
+            samples = decoder.get_all_samples()
+            waveform, sample_rate = samples.data, samples.sample_rate
+        else:
+            waveform, sample_rate = torchaudio.load(path)
+        waveform = ensure_3d_tensor(waveform).float()
+        if memory_map:
+            output = allocate_waveform(waveform.shape[1], waveform.shape[2], memory_map)
+            output.copy_(waveform)
+            return output, sample_rate
+        return waveform, sample_rate
+    
+    sample_rate = decoder.metadata.sample_rate
+    channels = decoder.metadata.num_channels
+    # Header durations are estimates for VBR MP3; leave headroom and trim to what was decoded
+    capacity = int(duration * sample_rate * 1.01) + sample_rate
+    output = allocate_waveform(channels, capacity, memory_map)
+    end = 0
+    for start_seconds in range(0, capacity // sample_rate + 1, DECODE_CHUNK_SECONDS):
+        try:
+            samples = decoder.get_samples_played_in_range(start_seconds, start_seconds + DECODE_CHUNK_SECONDS)
+        except (ValueError, RuntimeError):
+            # Started past the real end of a file whose header overstated its duration
+            break
+        position = min(round(samples.pts_seconds * sample_rate), capacity)
+        count = min(samples.data.shape[-1], capacity - position)
+        if count <= 0:
+            break
+        output[0, :, position:position + count] = samples.data[:, :count]
+        end = max(end, position + count)
+    return output[..., :max(end, 1)], sample_rate
+
+
+def load_audio_from_file(path, output_format=None, memory_map=False):
+    """
+    Load audio from a file without reading the whole file into memory
+    
+    Raw PCM and WAV are converted chunk by chunk into a preallocated output,
+    and compressed formats are decoded DECODE_CHUNK_SECONDS at a time where
+    torchcodec is available, so peak memory is the output plus one chunk.
+    
+    Args:
+        path: Audio file, e.g. from download_to_file
+        output_format: Requested output format; pcm_* files are headerless PCM
+        memory_map: Return a waveform backed by a temporary file (see allocate_waveform)
+        
+    Returns:
+        Tuple of (waveform [1, channels, samples], sample_rate) in ComfyUI format
+    """
+    sample_rate = pcm_sample_rate(output_format) if output_format else None
+    if sample_rate:
+        return _load_pcm16_file(path, sample_rate, memory_map)
+    
+    with open(path, "rb") as f:
+        magic = f.read(12)
+    if magic[:4] == b"RIFF" and magic[8:12] == b"WAVE":
+        loaded = _load_wav_file(path, memory_map)
+        if loaded is not None:
+            return loaded
+    return _load_compressed_file(path, memory_map)
+
+
+def concat_with_crossfade(waveforms, sample_rate, crossfade_ms=10.0):
+    """
+    Join audio segments into one preallocated waveform with short linear crossfades
+    
+    Args:
+        waveforms: List of 3D tensors [1, channels, samples] at the same sample rate
+        sample_rate: Sample rate of the segments
+        crossfade_ms: Overlap at each boundary in milliseconds
+        
+    Returns:
+        3D tensor [1, channels, total_samples]
+    """
+    waveforms = [ensure_3d_tensor(w).float() for w in waveforms]
+    if len(waveforms) == 1:
+        return waveforms[0]
+    channels = max(w.shape[1] for w in waveforms)
+    fade = int(sample_rate * crossfade_ms / 1000.0)
+    # Never overlap more than half of the shortest segment
+    fade = max(0, min([fade] + [w.shape[2] // 2 for w in waveforms]))
+    total = sum(w.shape[2] for w in waveforms) - fade * (len(waveforms) - 1)
+    
+    output = torch.zeros(1, channels, total, dtype=torch.float32)
+    ramp = torch.linspace(0.0, 1.0, fade) if fade else None
+    position = 0
+    for index, waveform in enumerate(waveforms):
+        waveform = waveform.expand(1, channels, -1) if waveform.shape[1] != channels else waveform
+        length = waveform.shape[2]
+        if index > 0 and fade:
+            # Fade the tail already written out and this segment's head in, then sum
+            output[:, :, position:position + fade] *= ramp.flip(0)
+            output[:, :, position:position + fade] += waveform[:, :, :fade] * ramp
+            output[:, :, position + fade:position + length] = waveform[:, :, fade:]
+        else:
+            output[:, :, position:position + length] = waveform
+        position += length - fade
+    return output
+
+
+def encode_audio_blob(waveform, sample_rate):
+    """
+    Serialize decoded audio compactly (int16 PCM) for on-disk caching
+    
+    Args:
+        waveform: Float audio tensor in [-1, 1]
+        sample_rate: Sample rate of audio
+        
+    Returns:
+        Bytes blob
+    """
+    pcm = (ensure_3d_tensor(waveform).clamp(-1.0, 1.0) * 32767.0).round().to(torch.int16)
+    buffer = io.BytesIO()
+    torch.save({"pcm": pcm.contiguous(), "sample_rate": int(sample_rate)}, buffer)
+    return buffer.getvalue()
+
+
+def decode_audio_blob(blob):
+    """
+    Restore audio serialized by encode_audio_blob
+    
+    Args:
+        blob: Bytes blob
+        
+    Returns:
+        Tuple of (waveform, sample_rate) in ComfyUI format
+    """
+    data = torch.load(io.BytesIO(blob), weights_only=True)
+    waveform = data["pcm"].float() / 32767.0
+    return waveform, data["sample_rate"]
+
+
+class PCMStreamDecoder:
+    """
+    Incrementally decode raw 16-bit little-endian mono PCM
+    
+    Samples are scaled straight into a preallocated float32 buffer that
+    doubles when full, so streamed audio is never re-concatenated.
+    """
+    
+    def __init__(self, sample_rate, initial_seconds=10.0):
+        self.sample_rate = sample_rate
+        self.num_samples = 0
+        self._buffer = torch.empty(max(1, int(sample_rate * initial_seconds)), dtype=torch.float32)
+        self._remainder = b""
+    
+    def feed(self, data):
+        """
+        Decode a chunk of bytes
+        
+        Returns:
+            1D float32 view of the newly decoded samples
+        """
+        if self._remainder:
+            data = self._remainder + data
+        usable = len(data) - (len(data) % 2)
+        self._remainder = data[usable:]
+        if usable == 0:
+            return self._buffer[:0]
+        
+        samples = _pcm16_view(data, usable // 2)
+        end = self.num_samples + samples.numel()
+        if end > self._buffer.numel():
+            grown = torch.empty(max(end, self._buffer.numel() * 2), dtype=torch.float32)
+            grown[:self.num_samples] = self._buffer[:self.num_samples]
+            self._buffer = grown
+        decoded = self._buffer[self.num_samples:end]
+        torch.mul(samples, 1.0 / 32768.0, out=decoded)
+        self.num_samples = end
+        return decoded
+    
+    def waveform(self):
+        """Get everything decoded so far as a 3D tensor [1, 1, samples]"""
+        return self._buffer[:self.num_samples].view(1, 1, -1)
+
+
 def create_empty_audio(sample_rate=44100):
     """
     Create empty audio tensor for error cases
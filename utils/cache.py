@@ -1,64 +1,476 @@
 """Caching system for ElevenLabs API data"""
 
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
 import time
+from collections import OrderedDict
+
+
+CACHE_ROOT = os.environ.get(
+    "ELEVENLABS_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache")
+)
+
+
+def atomic_write(path, data):
+    """Write bytes to path via a temp file and rename, so readers never see partial data"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
 
 
 class ElevenLabsCache:
-    """Shared cache for voices and models across all nodes"""
+    """
+    Shared cache for voices and models across all nodes
+    
+    Entries are keyed per tenant (a hash of the API key), each with its own
+    TTL, and the number of tenants is LRU-bounded. Calls without an API key
+    (e.g. from INPUT_TYPES) resolve to the most recently used tenant so the
+    UI shows the account that last ran a workflow.
+    
+    The catalogs are also snapshotted to disk (tenant hashes only, never API
+    keys) and loaded lazily on first access, so a restart can populate the
+    node menus without a network round trip.
+    """
     
-    voices_cache = None
-    models_cache = None
-    voices_last_fetch = 0
-    models_last_fetch = 0
     cache_duration = 3600  # 1 hour in seconds
+    max_tenants = 32
+    snapshot_path = os.path.join(CACHE_ROOT, "catalog.json")
+    
+    _tenants = OrderedDict()  # tenant -> {"voices": entry, "models": entry}
+    _api_keys = {}  # tenant -> API key, in memory only, for keyless refreshes
+    _active_tenant = None
+    _lock = threading.RLock()
+    
+    _refreshing = {}  # (kind, tenant) -> threading.Event set when the refresh finishes
+    _refresh_count = 0
+    _refresh_total_seconds = 0.0
+    _last_refresh_seconds = None
+    _snapshot_loaded = False
+    
+    @staticmethod
+    def tenant_key(api_key):
+        """Hash an API key into a tenant identifier"""
+        if not api_key:
+            return "anonymous"
+        return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+    
+    @classmethod
+    def _load_snapshot(cls):
+        """Load the on-disk catalog snapshot once (caller holds the lock)"""
+        if cls._snapshot_loaded:
+            return
+        cls._snapshot_loaded = True
+        try:
+            with open(cls.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable voice catalog snapshot: {str(e)}")
+            return
+        for tenant, entries in snapshot.get("tenants", {}).items():
+            # Entries keep their original fetch time, so expired ones get revalidated
+            cls._tenants.setdefault(tenant, entries)
+        if cls._active_tenant is None:
+            cls._active_tenant = snapshot.get("active_tenant")
+        print(f"✓ Loaded voice catalog snapshot ({len(snapshot.get('tenants', {}))} accounts)")
+    
+    @classmethod
+    def _save_snapshot(cls):
+        """Atomically persist the current catalogs to disk"""
+        with cls._lock:
+            snapshot = {
+                "active_tenant": cls._active_tenant,
+                "tenants": {tenant: dict(entries) for tenant, entries in cls._tenants.items()},
+            }
+        try:
+            atomic_write(cls.snapshot_path, json.dumps(snapshot).encode("utf-8"))
+        except OSError as e:
+            print(f"⚠️ Could not write voice catalog snapshot: {str(e)}")
+    
+    @classmethod
+    def _resolve(cls, api_key):
+        """Map an API key (or None) to a tenant identifier"""
+        cls._load_snapshot()
+        if api_key:
+            return cls.tenant_key(api_key)
+        return cls._active_tenant or cls.tenant_key(None)
+    
+    @classmethod
+    def resolve_api_key(cls, api_key=None):
+        """Get the given API key, or the most recently used tenant's key"""
+        if api_key:
+            return api_key
+        with cls._lock:
+            cls._load_snapshot()
+            return cls._api_keys.get(cls._active_tenant)
+    
+    @classmethod
+    def can_refresh(cls, api_key=None):
+        """
+        Check whether a keyless lookup can be refreshed from the network
+        
+        A tenant restored from the snapshot has no known API key until a node
+        runs with it, so its data can only be served, not revalidated.
+        """
+        if api_key:
+            return True
+        with cls._lock:
+            tenant = cls._resolve(None)
+            return tenant == cls.tenant_key(None) or tenant in cls._api_keys
+    
+    @classmethod
+    def set_active_tenant(cls, api_key):
+        """Make this API key's tenant the one used for keyless lookups"""
+        if not api_key:
+            return
+        with cls._lock:
+            cls._load_snapshot()
+            tenant = cls.tenant_key(api_key)
+            cls._active_tenant = tenant
+            cls._api_keys[tenant] = api_key
+            if tenant in cls._tenants:
+                cls._tenants.move_to_end(tenant)
+    
+    @classmethod
+    def _get_entry(cls, kind, api_key):
+        with cls._lock:
+            tenant = cls._resolve(api_key)
+            entries = cls._tenants.get(tenant)
+            if entries is None:
+                return None
+            cls._tenants.move_to_end(tenant)
+            return entries.get(kind)
+    
+    @classmethod
+    def _set_entry(cls, kind, value, api_key, ttl):
+        with cls._lock:
+            tenant = cls._resolve(api_key)
+            entries = cls._tenants.setdefault(tenant, {})
+            entries[kind] = {
+                "value": value,
+                "fetched_at": time.time(),
+                "ttl": cls.cache_duration if ttl is None else ttl,
+            }
+            cls._tenants.move_to_end(tenant)
+            if api_key:
+                cls._active_tenant = tenant
+                cls._api_keys[tenant] = api_key
+            while len(cls._tenants) > cls.max_tenants:
+                evicted, _ = cls._tenants.popitem(last=False)
+                cls._api_keys.pop(evicted, None)
+                if evicted == cls._active_tenant:
+                    cls._active_tenant = None
+        cls._save_snapshot()
     
     @classmethod
-    def force_refresh_voices(cls):
-        """Force refresh voices cache"""
-        cls.voices_cache = None
-        cls.voices_last_fetch = 0
+    def _invalidate(cls, kind, api_key):
+        with cls._lock:
+            if api_key is None:
+                targets = list(cls._tenants.values())
+            else:
+                targets = [cls._tenants.get(cls.tenant_key(api_key)) or {}]
+            for entries in targets:
+                entries.pop(kind, None)
+    
+    @classmethod
+    def _is_valid(cls, kind, api_key):
+        entry = cls._get_entry(kind, api_key)
+        return entry is not None and (time.time() - entry["fetched_at"]) < entry["ttl"]
+    
+    @classmethod
+    def begin_refresh(cls, kind, api_key=None):
+        """
+        Claim the refresh of one tenant's entry so concurrent callers don't duplicate it
+        
+        Returns:
+            Tuple of (claimed, event); when not claimed, wait on event for the owner
+        """
+        with cls._lock:
+            slot = (kind, cls._resolve(api_key))
+            event = cls._refreshing.get(slot)
+            if event is not None:
+                return False, event
+            event = threading.Event()
+            cls._refreshing[slot] = event
+            return True, event
+    
+    @classmethod
+    def end_refresh(cls, kind, api_key=None, seconds=None):
+        """Release a refresh claimed with begin_refresh and record its latency"""
+        with cls._lock:
+            event = cls._refreshing.pop((kind, cls._resolve(api_key)), None)
+            if seconds is not None:
+                cls._refresh_count += 1
+                cls._refresh_total_seconds += seconds
+                cls._last_refresh_seconds = seconds
+        if event is not None:
+            event.set()
+    
+    @classmethod
+    def get_age(cls, kind, api_key=None):
+        """Seconds since the entry was fetched, or None if absent"""
+        entry = cls._get_entry(kind, api_key)
+        return None if entry is None else time.time() - entry["fetched_at"]
+    
+    @classmethod
+    def get_stats(cls, api_key=None):
+        """Get data age and refresh latency metrics"""
+        with cls._lock:
+            return {
+                "tenants": len(cls._tenants),
+                "voices_age_seconds": cls.get_age("voices", api_key),
+                "models_age_seconds": cls.get_age("models", api_key),
+                "refreshes": cls._refresh_count,
+                "refreshes_in_flight": len(cls._refreshing),
+                "last_refresh_seconds": cls._last_refresh_seconds,
+                "avg_refresh_seconds": (cls._refresh_total_seconds / cls._refresh_count
+                                        if cls._refresh_count else None),
+            }
+    
+    @classmethod
+    def force_refresh_voices(cls, api_key=None):
+        """Force refresh voices cache (all tenants when no API key is given)"""
+        cls._invalidate("voices", api_key)
         print("🔄 Voice cache invalidated")
     
     @classmethod
-    def force_refresh_models(cls):
-        """Force refresh models cache"""
-        cls.models_cache = None
-        cls.models_last_fetch = 0
+    def force_refresh_models(cls, api_key=None):
+        """Force refresh models cache (all tenants when no API key is given)"""
+        cls._invalidate("models", api_key)
         print("🔄 Model cache invalidated")
     
     @classmethod
-    def is_voices_cache_valid(cls):
+    def is_voices_cache_valid(cls, api_key=None):
         """Check if voices cache is still valid"""
-        current_time = time.time()
-        return (cls.voices_cache is not None and 
-                (current_time - cls.voices_last_fetch) < cls.cache_duration)
+        return cls._is_valid("voices", api_key)
     
     @classmethod
-    def is_models_cache_valid(cls):
+    def is_models_cache_valid(cls, api_key=None):
         """Check if models cache is still valid"""
-        current_time = time.time()
-        return (cls.models_cache is not None and 
-                (current_time - cls.models_last_fetch) < cls.cache_duration)
+        return cls._is_valid("models", api_key)
     
     @classmethod
-    def set_voices(cls, voices):
+    def set_voices(cls, voices, api_key=None, ttl=None):
         """Set voices cache"""
-        cls.voices_cache = voices
-        cls.voices_last_fetch = time.time()
+        cls._set_entry("voices", voices, api_key, ttl)
     
     @classmethod
-    def set_models(cls, models):
+    def set_models(cls, models, api_key=None, ttl=None):
         """Set models cache"""
-        cls.models_cache = models
-        cls.models_last_fetch = time.time()
+        cls._set_entry("models", models, api_key, ttl)
     
     @classmethod
-    def get_voices(cls):
+    def get_voices(cls, api_key=None):
         """Get cached voices"""
-        return cls.voices_cache
+        entry = cls._get_entry("voices", api_key)
+        return entry["value"] if entry else None
     
     @classmethod
-    def get_models(cls):
+    def get_models(cls, api_key=None):
         """Get cached models"""
-        return cls.models_cache
+        entry = cls._get_entry("models", api_key)
+        return entry["value"] if entry else None
+
 
+class DiskCache:
+    """
+    Content-addressed on-disk cache with a byte budget and LRU eviction
+    
+    Entries are written to a temp file and renamed into place, so several
+    ComfyUI workers can share one directory without seeing partial files.
+    File mtime doubles as the LRU clock and is bumped on every hit.
+    """
+    
+    def __init__(self, namespace, max_bytes, suffix=".bin"):
+        self.directory = os.path.join(CACHE_ROOT, namespace)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self._total_bytes = None
+        self.hits = 0
+        self.misses = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def make_key(*parts):
+        """Hash JSON-serializable parts into a stable hex key"""
+        blob = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+    
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + self.suffix)
+    
+    def _scan(self):
+        """List (mtime, size, path) for every entry on disk"""
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(self.suffix):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        return entries
+    
+    def get(self, key):
+        """
+        Read an entry
+        
+        Returns:
+            Stored bytes, or None on miss
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path, None)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            self.bytes_read += len(data)
+        return data
+    
+    def get_path(self, key):
+        """
+        Locate an entry on disk, for callers that stream it instead of reading it whole
+        
+        Returns:
+            Path of the entry, or None on miss
+        """
+        path = self._path(key)
+        try:
+            os.utime(path, None)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return path
+    
+    def put_file(self, key, source):
+        """
+        Move a finished file (e.g. a streamed download) into the cache, then evict over budget
+        
+        Returns:
+            Path of the entry, or None if it was not stored (source is removed either way)
+        """
+        size = os.path.getsize(source)
+        path = self._path(key)
+        try:
+            if self.max_bytes <= 0 or size > self.max_bytes:
+                return None
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                os.replace(source, path)
+            except OSError:
+                # Different filesystem: copy next to the entry, then rename into place
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+                os.close(fd)
+                try:
+                    shutil.copyfile(source, tmp_path)
+                    os.replace(tmp_path, path)
+                except BaseException:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    raise
+        except OSError as e:
+            print(f"⚠️ Could not write cache entry {key[:12]}: {str(e)}")
+            return None
+        finally:
+            if os.path.exists(source):
+                os.remove(source)
+        
+        with self._lock:
+            self.bytes_written += size
+            if self._total_bytes is None:
+                self._total_bytes = sum(entry_size for _, entry_size, _ in self._scan())
+            else:
+                self._total_bytes += size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+        return path
+    
+    def put(self, key, data):
+        """Atomically store an entry, then evict least recently used entries over budget"""
+        if self.max_bytes <= 0 or len(data) > self.max_bytes:
+            return
+        try:
+            atomic_write(self._path(key), data)
+        except OSError as e:
+            print(f"⚠️ Could not write cache entry {key[:12]}: {str(e)}")
+            return
+        
+        with self._lock:
+            self.bytes_written += len(data)
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._scan())
+            else:
+                self._total_bytes += len(data)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+    
+    def _evict(self):
+        """Drop oldest entries until under budget (caller holds the lock)"""
+        # Rescan, since other processes may share the directory
+        entries = sorted(self._scan())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+        self._total_bytes = total
+    
+    def clear(self):
+        """Remove every entry in this namespace"""
+        with self._lock:
+            for _, _, path in self._scan():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._total_bytes = 0
+    
+    def get_stats(self):
+        """Get hit/miss/byte counters"""
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._scan())
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bytes_read": self.bytes_read,
+                "bytes_written": self.bytes_written,
+                "evictions": self.evictions,
+                "size_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "directory": self.directory,
+            }
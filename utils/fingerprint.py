@@ -0,0 +1,24 @@
+"""Stable fingerprints of node inputs for ComfyUI's IS_CHANGED"""
+
+import hashlib
+import json
+
+
+def input_fingerprint(inputs):
+    """
+    Fingerprint a node's widget values for IS_CHANGED
+    
+    Identical values give the same result, so ComfyUI reuses the node's
+    cached output instead of calling the API again. ComfyUI passes None for
+    linked inputs (AUDIO inputs are always linked), so only widget values,
+    including regenerate, reach this; a changed upstream output re-runs the
+    node through ComfyUI's own cache keys.
+    
+    Args:
+        inputs: Dict of the node's input values as passed to IS_CHANGED
+    
+    Returns:
+        Hex digest string
+    """
+    blob = json.dumps(inputs, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
@@ -0,0 +1,323 @@
+"""Background tracking of long-running ElevenLabs jobs (dubbing)"""
+
+import json
+import os
+import threading
+import time
+import requests
+from .api import ElevenLabsClient, map_concurrently
+from .cache import CACHE_ROOT, DiskCache, ElevenLabsCache, atomic_write
+
+
+# Statuses after which a dubbing job never changes again
+TERMINAL_STATUSES = ("dubbed", "failed")
+
+
+class DubbingJobManager:
+    """
+    Registry and background poller for dubbing jobs
+    
+    Submitting only records the job; a single daemon thread polls every
+    outstanding job with adaptive backoff (starting from the API's expected
+    duration, then growing while the job is still running) and downloads the
+    dubbed audio as soon as it is ready, so no ComfyUI worker ever waits on
+    the remote job.
+    
+    Jobs are persisted to a JSON registry in the cache directory and survive
+    restarts. Like the voice catalog snapshot, it stores tenant hashes only,
+    never API keys: a restored job resumes polling once a node runs with its
+    API key again. Finished jobs are forgotten after job_retention seconds,
+    and their audio lives in a size-bounded DiskCache (re-downloaded if evicted).
+    
+    Jobs and their audio are keyed by tenant and dubbing ID, so a caller only
+    ever sees jobs submitted or tracked with its own API key.
+    """
+    
+    registry_path = os.path.join(CACHE_ROOT, "dubbing_jobs.json")
+    results_cache = DiskCache("dubbing", int(os.environ.get("ELEVENLABS_DUBBING_CACHE_MB", "2048")) * 1024 * 1024,
+                              suffix=".mp3")
+    job_retention = int(os.environ.get("ELEVENLABS_DUBBING_RETENTION_DAYS", "7")) * 86400
+    min_poll_interval = 5.0
+    max_poll_interval = 60.0
+    backoff_factor = 1.5
+    
+    _jobs = {}  # "tenant:dubbing_id" -> job record
+    _api_keys = {}  # tenant -> API key, in memory only
+    _lock = threading.RLock()
+    _wakeup = threading.Condition(_lock)
+    _poller = None
+    _loaded = False
+    _stats = {
+        "polls": 0,
+        "poll_errors": 0,
+        "downloads": 0,
+    }
+    
+    @staticmethod
+    def _job_key(tenant, dubbing_id):
+        return f"{tenant}:{dubbing_id}"
+    
+    @classmethod
+    def _load(cls):
+        """Load the on-disk registry once (caller holds the lock)"""
+        if cls._loaded:
+            return
+        cls._loaded = True
+        try:
+            with open(cls.registry_path, "r", encoding="utf-8") as f:
+                jobs = json.load(f).get("jobs", {})
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable dubbing job registry: {str(e)}")
+            return
+        for job in jobs.values():
+            cls._jobs.setdefault(cls._job_key(job["tenant"], job["dubbing_id"]), job)
+        cls._prune()
+        pending = sum(1 for job in jobs.values() if job["status"] not in TERMINAL_STATUSES)
+        print(f"✓ Loaded dubbing job registry ({len(jobs)} jobs, {pending} in progress)")
+    
+    @classmethod
+    def _prune(cls):
+        """Forget finished jobs older than job_retention (caller holds the lock)"""
+        cutoff = time.time() - cls.job_retention
+        for key, job in list(cls._jobs.items()):
+            if job["status"] in TERMINAL_STATUSES and job["updated_at"] < cutoff:
+                del cls._jobs[key]
+    
+    @classmethod
+    def _save(cls):
+        """Atomically persist the registry"""
+        with cls._lock:
+            cls._prune()
+            blob = json.dumps({"jobs": cls._jobs}, indent=1).encode("utf-8")
+        try:
+            atomic_write(cls.registry_path, blob)
+        except OSError as e:
+            print(f"⚠️ Could not write dubbing job registry: {str(e)}")
+    
+    @classmethod
+    def _remember_key(cls, api_key):
+        """Keep the API key in memory so the poller can act for its tenant"""
+        tenant = ElevenLabsCache.tenant_key(api_key)
+        if api_key:
+            cls._api_keys[tenant] = api_key
+        return tenant
+    
+    @classmethod
+    def _ensure_poller(cls):
+        """Start the poller thread if there is work it can do (caller holds the lock)"""
+        if cls._poller is not None and cls._poller.is_alive():
+            cls._wakeup.notify_all()
+            return
+        if not any(job["status"] not in TERMINAL_STATUSES and job["tenant"] in cls._api_keys
+                   for job in cls._jobs.values()):
+            return
+        cls._poller = threading.Thread(target=cls._poll_loop, name="elevenlabs-dubbing-poller", daemon=True)
+        cls._poller.start()
+    
+    @classmethod
+    def submit(cls, api_key, dubbing_id, target_language, expected_seconds=None):
+        """
+        Register a newly created dubbing job for background tracking
+        
+        Args:
+            api_key: ElevenLabs API key the job belongs to
+            dubbing_id: ID returned by POST /v1/dubbing
+            target_language: Language code the job dubs into, or None to read it from the job
+            expected_seconds: Processing time estimate from the API, if given
+            
+        Returns:
+            The job record
+        """
+        now = time.time()
+        first_poll = min(max((expected_seconds or 0) * 0.8, cls.min_poll_interval), cls.max_poll_interval)
+        with cls._lock:
+            cls._load()
+            job = {
+                "dubbing_id": dubbing_id,
+                "tenant": cls._remember_key(api_key),
+                "target_language": target_language,
+                "status": "dubbing",
+                "error": None,
+                "result_path": None,
+                "created_at": now,
+                "updated_at": now,
+                "next_poll_at": now + first_poll,
+                "poll_interval": first_poll,
+            }
+            cls._jobs[cls._job_key(job["tenant"], dubbing_id)] = job
+            cls._ensure_poller()
+        cls._save()
+        return dict(job)
+    
+    @classmethod
+    def get_job(cls, dubbing_id, api_key):
+        """
+        Look up one of this API key's jobs, resuming its polling if the key was not known yet
+        
+        Returns:
+            Copy of the job record, or None for an ID unknown to this key's tenant
+        """
+        with cls._lock:
+            cls._load()
+            tenant = cls._remember_key(api_key)
+            job = cls._jobs.get(cls._job_key(tenant, dubbing_id))
+            if job is None:
+                return None
+            cls._ensure_poller()
+            return dict(job)
+    
+    @classmethod
+    def track(cls, api_key, dubbing_id, target_language):
+        """Register a job created elsewhere (e.g. in the ElevenLabs web app) by its ID"""
+        job = cls.get_job(dubbing_id, api_key)
+        if job is not None:
+            if target_language and not job["target_language"]:
+                # A job that stopped for want of a language can resume now that it has one
+                fields = {"target_language": target_language}
+                if job["status"] == "failed":
+                    fields.update(status="dubbing", error=None, next_poll_at=time.time())
+                cls._update(cls._job_key(job["tenant"], dubbing_id), **fields)
+                job.update(fields)
+                with cls._lock:
+                    cls._ensure_poller()
+            return job
+        job = cls.submit(api_key, dubbing_id, target_language)
+        with cls._lock:
+            # Nothing is known about its progress, so check right away
+            cls._jobs[cls._job_key(job["tenant"], dubbing_id)]["next_poll_at"] = time.time()
+            cls._wakeup.notify_all()
+        return job
+    
+    @classmethod
+    def _update(cls, key, **fields):
+        with cls._lock:
+            job = cls._jobs.get(key)
+            if job is None:
+                return
+            job.update(fields, updated_at=time.time())
+        cls._save()
+    
+    @classmethod
+    def _poll_loop(cls):
+        """Poll due jobs until none are left in progress"""
+        while True:
+            with cls._lock:
+                pending = [job for job in cls._jobs.values()
+                           if job["status"] not in TERMINAL_STATUSES and job["tenant"] in cls._api_keys]
+                if not pending:
+                    cls._poller = None
+                    return
+                now = time.time()
+                due = [dict(job) for job in pending if job["next_poll_at"] <= now]
+                if not due:
+                    cls._wakeup.wait(min(job["next_poll_at"] for job in pending) - now)
+                    continue
+                api_keys = dict(cls._api_keys)
+            
+            # Jobs fanned out together come due together; check them side by side
+            map_concurrently(lambda job: cls._poll(job, api_keys[job["tenant"]]), due)
+    
+    @classmethod
+    def _poll(cls, job, api_key):
+        """Check one job's status and fetch its audio once dubbed"""
+        dubbing_id = job["dubbing_id"]
+        key = cls._job_key(job["tenant"], dubbing_id)
+        interval = min(job["poll_interval"] * cls.backoff_factor, cls.max_poll_interval)
+        headers = {
+            "xi-api-key": api_key,
+        }
+        
+        try:
+            response = ElevenLabsClient.get(f"/v1/dubbing/{dubbing_id}", headers=headers)
+            response.raise_for_status()
+            result = response.json()
+        except requests.exceptions.RequestException as e:
+            with cls._lock:
+                cls._stats["poll_errors"] += 1
+            status_code = e.response.status_code if getattr(e, "response", None) is not None else None
+            if status_code in (401, 403, 404):
+                print(f"❌ Dubbing {dubbing_id}: {str(e)}")
+                cls._update(key, status="failed", error=str(e))
+            else:
+                cls._update(key, next_poll_at=time.time() + interval, poll_interval=interval)
+            return
+        
+        with cls._lock:
+            cls._stats["polls"] += 1
+        status = result.get("status", "unknown")
+        # Jobs tracked by ID alone learn their language from the status response
+        language = job["target_language"] or (result.get("target_languages") or [None])[0]
+        if status == "dubbed" and not language:
+            error = "Unknown target language; set target_language on the Fetch Dubbing Result node"
+            print(f"❌ Dubbing {dubbing_id}: {error}")
+            cls._update(key, status="failed", error=error)
+        elif status == "dubbed":
+            try:
+                path = cls._download(api_key, dubbing_id, language)
+            except (requests.exceptions.RequestException, OSError) as e:
+                print(f"⚠️ Dubbing {dubbing_id} is done but the download failed: {str(e)}")
+                cls._update(key, next_poll_at=time.time() + interval, poll_interval=interval)
+                return
+            print(f"✓ Dubbing {dubbing_id} complete ({language})")
+            cls._update(key, status="dubbed", target_language=language, result_path=path)
+        elif status == "failed":
+            print(f"❌ Dubbing {dubbing_id} failed: {result.get('error')}")
+            cls._update(key, status="failed", error=result.get("error"))
+        else:
+            cls._update(key, status=status, target_language=language,
+                        next_poll_at=time.time() + interval, poll_interval=interval)
+    
+    @staticmethod
+    def _result_key(api_key, dubbing_id, language):
+        """Cache key of a job's audio, scoped to the tenant that owns the job"""
+        return DiskCache.make_key(ElevenLabsCache.tenant_key(api_key), dubbing_id, language)
+    
+    @classmethod
+    def _download(cls, api_key, dubbing_id, language):
+        """Stream the dubbed audio for a language into the results cache"""
+        headers = {
+            "xi-api-key": api_key,
+        }
+        # Feature-length dubs are streamed to disk rather than buffered in memory
+        download = ElevenLabsClient.download("GET", f"/v1/dubbing/{dubbing_id}/audio/{language}", headers=headers)
+        path = cls.results_cache.put_file(cls._result_key(api_key, dubbing_id, language), download)
+        if path is None:
+            raise OSError(f"dubbed audio could not be stored in {cls.results_cache.directory}")
+        with cls._lock:
+            cls._stats["downloads"] += 1
+        return path
+    
+    @classmethod
+    def result_path(cls, dubbing_id, api_key):
+        """
+        Local file with a dubbed job's audio, downloading it again if it was evicted
+        
+        Returns:
+            Path, or None if the job is not dubbed or the download failed
+        """
+        job = cls.get_job(dubbing_id, api_key)
+        if job is None or job["status"] != "dubbed" or not job["target_language"]:
+            return None
+        path = cls.results_cache.get_path(cls._result_key(api_key, dubbing_id, job["target_language"]))
+        if path is not None:
+            return path
+        try:
+            path = cls._download(api_key, dubbing_id, job["target_language"])
+        except (requests.exceptions.RequestException, OSError) as e:
+            print(f"⚠️ Could not download dubbed audio for {dubbing_id}: {str(e)}")
+            return None
+        cls._update(cls._job_key(job["tenant"], dubbing_id), result_path=path)
+        return path
+    
+    @classmethod
+    def get_stats(cls):
+        """Get job counts by status and poller activity"""
+        with cls._lock:
+            cls._load()
+            stats = dict(cls._stats)
+            for job in cls._jobs.values():
+                stats[job["status"]] = stats.get(job["status"], 0) + 1
+            stats["poller_running"] = cls._poller is not None and cls._poller.is_alive()
+        return stats
@@ -0,0 +1,388 @@
+"""Rate-limit-aware request scheduling for ElevenLabs API calls"""
+
+import email.utils
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import weakref
+import requests
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+
+# Concurrent request limits per subscription tier
+# Source: https://elevenlabs.io/docs/models#concurrency-and-priority
+TIER_CONCURRENCY = {
+    "free": 2,
+    "starter": 3,
+    "creator": 5,
+    "pro": 10,
+    "scale": 15,
+    "business": 15,
+}
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Methods that can be repeated without side effects; other requests (POSTs that
+# create voices, dubbing jobs or bill characters) are only retried when the
+# server cannot have acted on them
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+
+class TokenBucket:
+    """Token bucket limiting request starts per second, with a shared pause for Retry-After"""
+    
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """Take one token, sleeping until it is available"""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Reserve the token now; a negative balance is the queue in front of us
+            self.tokens -= 1
+            wait = max(-self.tokens / self.rate, self.paused_until - now, 0.0)
+        if wait > 0:
+            time.sleep(wait)
+    
+    def pause(self, seconds):
+        """Hold back every request on this bucket for the given time"""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class ConcurrencyLimiter:
+    """Counting semaphore whose limit can change at runtime"""
+    
+    def __init__(self, limit):
+        self.limit = limit
+        self.active = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+    
+    def set_limit(self, limit):
+        with self._cond:
+            self.limit = max(1, limit)
+            self._cond.notify_all()
+    
+    def acquire(self):
+        with self._cond:
+            self.waiting += 1
+            try:
+                while self.active >= self.limit:
+                    self._cond.wait()
+            finally:
+                self.waiting -= 1
+            self.active += 1
+    
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+
+class RequestScheduler:
+    """
+    Central scheduler for all API requests
+    
+    Each API key gets a token bucket (request rate) and a concurrency limit
+    matched to its subscription tier. Throttled (429) and transient 5xx
+    responses are retried with bounded exponential backoff and full jitter,
+    honoring Retry-After when the API sends it. Non-idempotent requests are
+    retried only on 429 and on failures to connect, so a lost response never
+    creates a duplicate voice, dubbing job or charge.
+    """
+    
+    requests_per_second = float(os.environ.get("ELEVENLABS_RATE_LIMIT", "10"))
+    default_concurrency = int(os.environ.get("ELEVENLABS_MAX_CONCURRENCY", "3"))
+    max_retries = int(os.environ.get("ELEVENLABS_MAX_RETRIES", "4"))
+    backoff_base = 1.0
+    backoff_cap = 30.0
+    max_retry_after = 60.0
+    
+    _buckets = {}
+    _limiters = {}
+    _pending = 0
+    _lock = threading.Lock()
+    _stats = {
+        "requests": 0,
+        "retries": 0,
+        "throttled": 0,
+        "wait_seconds_total": 0.0,
+        "wait_seconds_max": 0.0,
+    }
+    
+    @staticmethod
+    def _key_id(api_key):
+        return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+    
+    @classmethod
+    def _get_slot(cls, api_key):
+        key_id = cls._key_id(api_key)
+        with cls._lock:
+            if key_id not in cls._buckets:
+                burst = max(1.0, cls.requests_per_second)
+                cls._buckets[key_id] = TokenBucket(cls.requests_per_second, burst)
+                cls._limiters[key_id] = ConcurrencyLimiter(cls.default_concurrency)
+            return cls._buckets[key_id], cls._limiters[key_id]
+    
+    @classmethod
+    def set_tier(cls, api_key, tier):
+        """
+        Match an API key's concurrency limit to its subscription tier
+        
+        Args:
+            api_key: ElevenLabs API key
+            tier: Subscription tier name as reported by /v1/user
+        
+        Returns:
+            The concurrency limit now in effect
+        """
+        limit = TIER_CONCURRENCY.get(str(tier).lower().split("_")[0], cls.default_concurrency)
+        _, limiter = cls._get_slot(api_key)
+        limiter.set_limit(limit)
+        return limit
+    
+    @classmethod
+    def _retry_delay(cls, attempt, response):
+        """Seconds to wait before the next attempt"""
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    parsed = email.utils.parsedate_to_datetime(retry_after)
+                    delay = parsed.timestamp() - time.time() if parsed else None
+                except (TypeError, ValueError):
+                    # Malformed header: fall back to exponential backoff
+                    delay = None
+            if delay is not None:
+                return min(max(delay, 0.0), cls.max_retry_after)
+        return random.uniform(0, min(cls.backoff_cap, cls.backoff_base * (2 ** attempt)))
+    
+    @staticmethod
+    def _never_sent(error):
+        """Whether a connection error happened before the request reached the server"""
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return True
+        reason = getattr(error.args[0], "reason", None) if error.args else None
+        return isinstance(reason, (ConnectTimeoutError, NewConnectionError))
+    
+    @staticmethod
+    def _hold_slot(response, limiter):
+        """
+        Keep a streamed response's concurrency slot until its body is consumed or closed
+        
+        The slot is released when iter_content (also behind .content) runs to
+        the end, when the response is closed, or at the latest when it is
+        garbage collected.
+        """
+        lock = threading.Lock()
+        held = [True]
+        
+        def release():
+            with lock:
+                if not held[0]:
+                    return
+                held[0] = False
+            limiter.release()
+        
+        close = response.close
+        iter_content = response.iter_content
+        
+        def close_and_release():
+            try:
+                close()
+            finally:
+                release()
+        
+        def iter_content_and_release(*args, **kwargs):
+            try:
+                yield from iter_content(*args, **kwargs)
+            finally:
+                release()
+        
+        response.close = close_and_release
+        response.iter_content = iter_content_and_release
+        weakref.finalize(response, release)
+    
+    @staticmethod
+    def _rewind(kwargs):
+        """Reset uploaded file objects so a retry resends the full body"""
+        for value in (kwargs.get("files") or {}).values():
+            fileobj = value[1] if isinstance(value, tuple) else value
+            if hasattr(fileobj, "seek"):
+                fileobj.seek(0)
+    
+    @classmethod
+    def run(cls, api_key, send, idempotent=True, max_retries=None, **kwargs):
+        """
+        Send a request under the key's rate and concurrency limits, retrying transient failures
+        
+        Args:
+            api_key: ElevenLabs API key the request is billed to
+            send: Callable performing the request with **kwargs
+            idempotent: Whether the request may be repeated after a 5xx or a lost response
+            max_retries: Override the retry budget (0 fails fast)
+            **kwargs: Arguments for send
+        
+        Returns:
+            Final requests.Response (may still be an error status once retries run out)
+        """
+        if max_retries is None:
+            max_retries = cls.max_retries
+        bucket, limiter = cls._get_slot(api_key)
+        attempt = 0
+        while True:
+            queued_at = time.perf_counter()
+            with cls._lock:
+                cls._pending += 1
+            try:
+                bucket.acquire()
+                limiter.acquire()
+            finally:
+                with cls._lock:
+                    cls._pending -= 1
+            waited = time.perf_counter() - queued_at
+            with cls._lock:
+                cls._stats["requests"] += 1
+                cls._stats["wait_seconds_total"] += waited
+                cls._stats["wait_seconds_max"] = max(cls._stats["wait_seconds_max"], waited)
+            
+            response = None
+            try:
+                if attempt:
+                    cls._rewind(kwargs)
+                response = send(**kwargs)
+            except requests.exceptions.ConnectionError as e:
+                if attempt >= max_retries or not (idempotent or cls._never_sent(e)):
+                    raise
+            finally:
+                if response is not None and kwargs.get("stream"):
+                    # The body is still to be read; the transfer keeps its slot until then
+                    cls._hold_slot(response, limiter)
+                else:
+                    limiter.release()
+            
+            if response is not None and response.status_code not in RETRY_STATUS_CODES:
+                return response
+            if response is not None and response.status_code != 429 and not idempotent:
+                return response
+            if attempt >= max_retries:
+                return response
+            
+            delay = cls._retry_delay(attempt, response)
+            status = response.status_code if response is not None else "connection error"
+            if response is not None and response.status_code == 429:
+                # Everyone on this key backs off, not just this request
+                bucket.pause(delay)
+                with cls._lock:
+                    cls._stats["throttled"] += 1
+            with cls._lock:
+                cls._stats["retries"] += 1
+            print(f"⏳ ElevenLabs API {status} - retrying in {delay:.1f}s "
+                  f"(attempt {attempt + 2}/{max_retries + 1})")
+            if response is not None:
+                # Return the connection to the pool; streamed bodies would otherwise hold it
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+    
+    @classmethod
+    def get_stats(cls):
+        """Get queue depth, wait time and retry metrics"""
+        with cls._lock:
+            stats = dict(cls._stats)
+            stats["queue_depth"] = cls._pending
+            limiters = list(cls._limiters.values())
+        stats["in_flight"] = sum(limiter.active for limiter in limiters)
+        stats["wait_seconds_avg"] = (stats["wait_seconds_total"] / stats["requests"]
+                                     if stats["requests"] else 0.0)
+        return stats
+
+
+class RequestCoalescer:
+    """
+    Single-flight coalescing of identical in-flight API calls
+    
+    Calls with the same canonical key (endpoint, payload, API key hash) that
+    overlap in time share one request: the first caller runs it, the rest
+    wait and receive the same decoded result (or exception).
+    """
+    
+    _calls = {}
+    _lock = threading.Lock()
+    _stats = {
+        "leaders": 0,
+        "coalesced": 0,
+        "characters_saved": 0,
+    }
+    
+    @staticmethod
+    def make_key(endpoint, payload, api_key):
+        """Canonicalize a request into a stable key"""
+        blob = json.dumps([endpoint, payload, RequestScheduler._key_id(api_key)],
+                          sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+    
+    @classmethod
+    def run(cls, key, fn, characters=0):
+        """
+        Run fn once per concurrent key and share its result
+        
+        Args:
+            key: Canonical request key from make_key
+            fn: Callable performing the request and decoding its result
+            characters: Billable characters a duplicate would have cost
+            
+        Returns:
+            Result of fn
+        """
+        with cls._lock:
+            call = cls._calls.get(key)
+            leader = call is None
+            if leader:
+                call = {"done": threading.Event(), "result": None, "error": None}
+                cls._calls[key] = call
+                cls._stats["leaders"] += 1
+            else:
+                cls._stats["coalesced"] += 1
+                cls._stats["characters_saved"] += characters
+        
+        if not leader:
+            print(f"🔗 Joined identical in-flight request ({characters} chars not re-billed)")
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+        
+        try:
+            call["result"] = fn()
+            return call["result"]
+        except BaseException as e:
+            call["error"] = e
+            raise
+        finally:
+            with cls._lock:
+                cls._calls.pop(key, None)
+            call["done"].set()
+    
+    @classmethod
+    def get_stats(cls):
+        """Get coalescing counters"""
+        with cls._lock:
+            stats = dict(cls._stats)
+            stats["in_flight"] = len(cls._calls)
+        return stats
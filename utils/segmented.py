@@ -0,0 +1,138 @@
+"""Segmented processing of long audio: per-segment retries and overlap-add reassembly"""
+
+import requests
+import torch
+from .api import map_concurrently
+from .audio import resample
+
+
+# Extra attempts for a failed segment before it is given up on
+SEGMENT_RETRIES = 2
+
+# Overlap between neighbouring windows, crossfaded on reassembly
+DEFAULT_OVERLAP_SECONDS = 0.5
+
+
+def call_with_retries(fn, index, total, retries=SEGMENT_RETRIES):
+    """
+    Run one segment's request, retrying it alone on transient failures
+    
+    Throttling and 5xx responses are already retried by the scheduler; this
+    covers what is left (timeouts, exhausted retries) without restarting
+    the whole job.
+    
+    Args:
+        fn: Callable performing the segment's request
+        index: Segment index, for logging
+        total: Segment count, for logging
+        retries: Extra attempts after the first
+        
+    Returns:
+        Result of fn; the last RequestException is raised once retries run out
+    """
+    for attempt in range(retries + 1):
+        try:
+            return fn()
+        except requests.exceptions.RequestException as e:
+            status = e.response.status_code if getattr(e, "response", None) is not None else None
+            # Client errors (other than throttling) will fail the same way again
+            retryable = status is None or status == 429 or status >= 500
+            if not retryable or attempt == retries:
+                if total > 1:
+                    print(f"❌ Segment {index + 1}/{total} failed: {str(e)}")
+                raise
+            print(f"⚠️ Segment {index + 1}/{total} failed ({str(e)}), retrying "
+                  f"(attempt {attempt + 2}/{retries + 1})")
+
+
+def plan_windows(length, window, overlap):
+    """
+    Overlapping windows covering length samples
+    
+    Returns:
+        List of (start, end) sample ranges; neighbours share overlap samples
+    """
+    if length <= window or window <= overlap:
+        return [(0, length)]
+    windows = []
+    start = 0
+    while True:
+        end = min(start + window, length)
+        windows.append((start, end))
+        if end >= length:
+            return windows
+        start = end - overlap
+
+
+def overlap_add(outputs, windows, sample_rate, length):
+    """
+    Reassemble processed windows into one waveform with linear crossfades
+    
+    Each overlap is faded out of one window and into the next with
+    complementary gains, so the output keeps unity gain throughout.
+    Outputs are trimmed or padded to their window's span to absorb codec
+    padding.
+    
+    Args:
+        outputs: List of (waveform [1, channels, samples], sample_rate), one per window
+        windows: Input (start, end) sample ranges from plan_windows
+        sample_rate: Sample rate of the input the windows refer to
+        length: Input length in samples
+        
+    Returns:
+        Tuple of (waveform [1, channels, samples] covering the input's duration, sample_rate)
+    """
+    out_rate = outputs[0][1]
+    scale = out_rate / sample_rate
+    channels = max(waveform.shape[1] for waveform, _ in outputs)
+    bounds = [(round(start * scale), round(end * scale)) for start, end in windows]
+    output = torch.zeros(1, channels, round(length * scale), dtype=torch.float32)
+    
+    for index, ((waveform, rate), (start, end)) in enumerate(zip(outputs, bounds)):
+        if rate != out_rate:
+            waveform = resample(waveform, rate, out_rate)
+        span = end - start
+        segment = torch.zeros(1, channels, span, dtype=torch.float32)
+        count = min(span, waveform.shape[2])
+        segment[:, :, :count] = waveform[:1, :, :count].float()
+        
+        fade_in = bounds[index - 1][1] - start if index > 0 else 0
+        fade_out = end - bounds[index + 1][0] if index + 1 < len(bounds) else 0
+        if fade_in > 0:
+            segment[:, :, :fade_in] *= (torch.arange(fade_in) + 0.5) / fade_in
+        if fade_out > 0:
+            segment[:, :, span - fade_out:] *= 1.0 - (torch.arange(fade_out) + 0.5) / fade_out
+        output[:, :, start:end] += segment
+    return output, out_rate
+
+
+def process_in_windows(waveform, sample_rate, process, window_seconds, overlap_seconds=DEFAULT_OVERLAP_SECONDS,
+                       max_parallel=4):
+    """
+    Run an audio-to-audio request over overlapping windows concurrently
+    
+    Args:
+        waveform: Audio tensor [1, channels, samples]
+        sample_rate: Sample rate of audio
+        process: Callable (window_waveform, sample_rate) -> (waveform, sample_rate)
+        window_seconds: Window length; 0 processes the audio in one piece
+        overlap_seconds: Overlap crossfaded between windows
+        max_parallel: Windows processed at once
+        
+    Returns:
+        Tuple of (waveform, sample_rate) covering the input's duration
+    """
+    length = waveform.shape[-1]
+    windows = plan_windows(length, int(window_seconds * sample_rate), int(overlap_seconds * sample_rate))
+    if len(windows) == 1:
+        return process(waveform, sample_rate)
+    
+    print(f"🔀 Processing {len(windows)} overlapping segments of up to {window_seconds}s, "
+          f"{max_parallel} in parallel")
+    outputs = map_concurrently(
+        lambda index: call_with_retries(
+            lambda: process(waveform[..., windows[index][0]:windows[index][1]], sample_rate), index, len(windows)
+        ),
+        range(len(windows)), limit=max_parallel
+    )
+    return overlap_add(outputs, windows, sample_rate, length)
@@ -0,0 +1,69 @@
+"""Text utilities for long-form synthesis"""
+
+import re
+
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?…。！？])\s+")
+
+
+def _sentence_units(paragraph, max_chars):
+    """Yield sentences of a paragraph, splitting oversized ones at word boundaries"""
+    for sentence in _SENTENCE_END.split(paragraph):
+        if len(sentence) <= max_chars:
+            yield sentence
+            continue
+        piece = ""
+        for word in sentence.split():
+            while len(word) > max_chars:
+                if piece:
+                    yield piece
+                    piece = ""
+                yield word[:max_chars]
+                word = word[max_chars:]
+            if piece and len(piece) + 1 + len(word) > max_chars:
+                yield piece
+                piece = ""
+            piece = f"{piece} {word}" if piece else word
+        if piece:
+            yield piece
+
+
+def split_text(text, max_chars):
+    """
+    Split text into chunks of at most max_chars at natural boundaries
+    
+    Paragraph breaks are preferred once a chunk is at least half full, then
+    sentence ends, then word boundaries; words are only cut as a last resort.
+    
+    Args:
+        text: Text to split
+        max_chars: Maximum characters per chunk
+    
+    Returns:
+        List of chunk strings in order
+    """
+    text = text.strip()
+    if len(text) <= max_chars:
+        return [text] if text else []
+    
+    chunks = []
+    current = ""
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if current and len(current) >= max_chars // 2:
+            chunks.append(current)
+            current = ""
+        separator = "\n\n" if current else ""
+        for unit in _sentence_units(paragraph, max_chars):
+            if current and len(current) + len(separator) + len(unit) > max_chars:
+                chunks.append(current)
+                current = ""
+                separator = ""
+            current += separator + unit
+            separator = " "
+    if current:
+        chunks.append(current)
+    return chunks
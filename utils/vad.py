@@ -0,0 +1,214 @@
+"""Energy-based voice activity detection for trimming silence before uploads"""
+
+import bisect
+import math
+import torch
+import torch.nn.functional as F
+
+
+# Silence handling modes offered by nodes
+TRIM_MODES = ("off", "edges", "compress")
+
+
+def frame_energy_db(waveform, sample_rate, frame_ms=20):
+    """
+    Mean energy of consecutive frames of the channel-averaged signal
+    
+    Returns:
+        Tuple of (energy per frame in dBFS, frame length in samples)
+    """
+    mono = waveform.reshape(-1, waveform.shape[-1]).float().mean(dim=0)
+    num_samples = mono.shape[0]
+    frame = max(1, int(sample_rate * frame_ms / 1000))
+    num_frames = math.ceil(num_samples / frame)
+    frames = F.pad(mono, (0, num_frames * frame - num_samples)).view(num_frames, frame)
+    return 10.0 * torch.log10(frames.pow(2).mean(dim=1) + 1e-10), frame
+
+
+def detect_speech(waveform, sample_rate, threshold_db=-40.0, floor_db=-60.0, frame_ms=20, pad_ms=200,
+                  min_gap_ms=600):
+    """
+    Find regions with voice activity from short-time frame energy
+    
+    A frame is active when its energy is within threshold_db of the loudest
+    frame and above floor_db (dBFS). Active regions are padded by pad_ms and
+    merged when separated by less than min_gap_ms.
+    
+    Args:
+        waveform: Audio tensor [..., channels, samples]
+        sample_rate: Sample rate of audio
+        threshold_db: Activity threshold relative to the loudest frame
+        floor_db: Absolute activity threshold
+        frame_ms: Analysis frame length
+        pad_ms: Context kept around each active region
+        min_gap_ms: Shorter silences are kept
+        
+    Returns:
+        List of (start, end) sample ranges, empty if nothing is active
+    """
+    num_samples = waveform.shape[-1]
+    energy_db, frame = frame_energy_db(waveform, sample_rate, frame_ms)
+    if energy_db.numel() == 0:
+        return []
+    
+    threshold = max(float(energy_db.max()) + threshold_db, floor_db)
+    active = (energy_db > threshold).to(torch.int8)
+    
+    # Run boundaries: +1 where activity starts, -1 one past where it ends
+    edges = torch.diff(active, prepend=active.new_zeros(1), append=active.new_zeros(1))
+    starts = (edges == 1).nonzero().flatten().tolist()
+    ends = (edges == -1).nonzero().flatten().tolist()
+    
+    pad = int(sample_rate * pad_ms / 1000)
+    min_gap = int(sample_rate * min_gap_ms / 1000)
+    regions = []
+    for start, end in zip(starts, ends):
+        start = max(0, start * frame - pad)
+        end = min(num_samples, end * frame + pad)
+        if regions and start - regions[-1][1] < min_gap:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    return regions
+
+
+def split_at_silence(waveform, sample_rate, max_seconds, search_seconds=None, frame_ms=20):
+    """
+    Split audio into segments of bounded length, cutting at low-energy points
+    
+    Each cut is placed at the quietest frame within the last search_seconds
+    before the length limit, so words are not cut in half.
+    
+    Args:
+        waveform: Audio tensor [..., channels, samples]
+        sample_rate: Sample rate of audio
+        max_seconds: Maximum segment length
+        search_seconds: Window searched for a cut (default: last 20% of a segment)
+        frame_ms: Analysis frame length
+    
+    Returns:
+        List of (start, end) sample ranges covering the whole audio in order
+    """
+    num_samples = waveform.shape[-1]
+    max_length = int(max_seconds * sample_rate)
+    if num_samples <= max_length or max_length <= 0:
+        return [(0, num_samples)]
+    
+    energy_db, frame = frame_energy_db(waveform, sample_rate, frame_ms)
+    search = int((search_seconds if search_seconds else max_seconds * 0.2) * sample_rate)
+    segments = []
+    start = 0
+    while num_samples - start > max_length:
+        first = math.ceil((start + max_length - search) / frame)
+        last = max(first + 1, (start + max_length) // frame)
+        # Latest of equally quiet frames, keeping segments as long as allowed
+        quietest = last - 1 - int(torch.argmin(energy_db[first:last].flip(0)))
+        cut = min(quietest * frame + frame // 2, start + max_length)
+        segments.append((start, cut))
+        start = cut
+    segments.append((start, num_samples))
+    return segments
+
+
+class SilenceMap:
+    """
+    Offset map between trimmed audio and the original timeline
+    
+    The trimmed audio is the kept regions of the original laid end to end.
+    Times and processed audio can be mapped back onto the original timeline.
+    """
+    
+    def __init__(self, regions, sample_rate, length):
+        self.sample_rate = sample_rate
+        self.length = length
+        self.regions = regions
+        # Start of each region within the trimmed audio
+        self.trimmed_starts = []
+        position = 0
+        for start, end in regions:
+            self.trimmed_starts.append(position)
+            position += end - start
+        self.trimmed_length = position
+    
+    @property
+    def duration(self):
+        return self.length / self.sample_rate
+    
+    @property
+    def trimmed_duration(self):
+        return self.trimmed_length / self.sample_rate
+    
+    def apply(self, waveform):
+        """Cut the kept regions out of audio on the original timeline"""
+        if len(self.regions) == 1 and self.regions[0] == (0, self.length):
+            return waveform
+        return torch.cat([waveform[..., start:end] for start, end in self.regions], dim=-1)
+    
+    def to_original(self, seconds, end=False):
+        """
+        Map a time in the trimmed audio to the original timeline
+        
+        Args:
+            seconds: Time in the trimmed audio
+            end: Time ends a span, so a region boundary maps to the end of the earlier region
+            
+        Returns:
+            Time in seconds on the original timeline
+        """
+        if not self.regions:
+            return seconds
+        position = seconds * self.sample_rate
+        find = bisect.bisect_left if end else bisect.bisect_right
+        index = max(0, find(self.trimmed_starts, position) - 1)
+        return (self.regions[index][0] + position - self.trimmed_starts[index]) / self.sample_rate
+    
+    def restore(self, waveform, sample_rate):
+        """
+        Re-pad processed trimmed audio to the original length
+        
+        Args:
+            waveform: Processed audio [batch, channels, samples], any sample rate
+            sample_rate: Sample rate of the processed audio
+            
+        Returns:
+            Tensor on the original timeline, silent outside the kept regions
+        """
+        scale = sample_rate / self.sample_rate
+        output = waveform.new_zeros(*waveform.shape[:-1], round(self.length * scale))
+        available = waveform.shape[-1]
+        for (start, end), trimmed_start in zip(self.regions, self.trimmed_starts):
+            source = round(trimmed_start * scale)
+            target = round(start * scale)
+            count = min(round((end - start) * scale), available - source, output.shape[-1] - target)
+            if count > 0:
+                output[..., target:target + count] = waveform[..., source:source + count]
+        return output
+
+
+def trim_silence(waveform, sample_rate, mode="compress", **vad_options):
+    """
+    Remove silence from audio before uploading it
+    
+    Args:
+        waveform: Audio tensor [..., channels, samples]
+        sample_rate: Sample rate of audio
+        mode: "edges" trims leading/trailing silence, "compress" also drops long pauses
+        **vad_options: Passed to detect_speech
+        
+    Returns:
+        Tuple of (trimmed waveform, SilenceMap)
+    """
+    length = waveform.shape[-1]
+    regions = detect_speech(waveform, sample_rate, **vad_options) if mode != "off" else []
+    if not regions:
+        # Nothing detected (or disabled): upload everything rather than risk dropping speech
+        regions = [(0, length)]
+    elif mode == "edges":
+        regions = [(regions[0][0], regions[-1][1])]
+    
+    silence_map = SilenceMap(regions, sample_rate, length)
+    if silence_map.trimmed_length < length:
+        saved = 1.0 - silence_map.trimmed_length / max(length, 1)
+        print(f"✂️ Trimmed silence: {silence_map.duration:.1f}s → {silence_map.trimmed_duration:.1f}s "
+              f"({100 * saved:.0f}% less audio uploaded)")
+    return silence_map.apply(waveform), silence_map
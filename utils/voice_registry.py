@@ -0,0 +1,156 @@
+"""Registry of cloned voices, so re-running a clone reuses the voice instead of creating a duplicate"""
+
+import json
+import os
+import threading
+import time
+from .api import fetch_voices_from_api
+from .cache import CACHE_ROOT, DiskCache, ElevenLabsCache, atomic_write
+
+
+class VoiceCloneRegistry:
+    """
+    Maps a hash of a clone's samples, name and labels to the voice it created
+    
+    Entries are checked against the account's voice list lazily: only when
+    a clone request hits them, and at most once per verify_interval. A voice
+    deleted from the account is forgotten and cloned again. Like the other
+    registries, it is keyed by tenant hash and never stores API keys.
+    """
+    
+    registry_path = os.path.join(CACHE_ROOT, "voice_clones.json")
+    verify_interval = 3600  # Seconds a successful check against the voice list holds
+    
+    _entries = {}  # key -> record
+    _lock = threading.Lock()
+    _loaded = False
+    _stats = {
+        "hits": 0,
+        "misses": 0,
+        "stale": 0,
+    }
+    
+    @staticmethod
+    def make_key(api_key, sample_fingerprints, name, labels):
+        """
+        Key a clone request by account, sample content, name and labels
+        
+        Args:
+            api_key: ElevenLabs API key (voices belong to an account)
+            sample_fingerprints: Content hashes of the preprocessed samples, in any order
+            name: Voice name
+            labels: Dict of voice labels
+            
+        Returns:
+            Hex key
+        """
+        return DiskCache.make_key(ElevenLabsCache.tenant_key(api_key), sorted(sample_fingerprints), name.strip(),
+                                  labels or {})
+    
+    @classmethod
+    def _load(cls):
+        """Load the on-disk registry once (caller holds the lock)"""
+        if cls._loaded:
+            return
+        cls._loaded = True
+        try:
+            with open(cls.registry_path, "r", encoding="utf-8") as f:
+                entries = json.load(f).get("voices", {})
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable voice clone registry: {str(e)}")
+            return
+        for key, entry in entries.items():
+            cls._entries.setdefault(key, entry)
+    
+    @classmethod
+    def _save(cls):
+        """Atomically persist the registry"""
+        with cls._lock:
+            blob = json.dumps({"voices": cls._entries}, indent=1).encode("utf-8")
+        try:
+            atomic_write(cls.registry_path, blob)
+        except OSError as e:
+            print(f"⚠️ Could not write voice clone registry: {str(e)}")
+    
+    @staticmethod
+    def _voice_exists(api_key, voice_id):
+        """
+        Check the account's voice list for a voice
+        
+        The cached list is tried first; a miss forces one refresh, since the
+        cached list may predate the clone. Only a successful refresh can
+        report the voice as gone: a stale list says nothing about a deletion.
+        
+        Returns:
+            True or False, or None if the voice list could not be fetched
+        """
+        suffix = f"({voice_id})"
+        voices = fetch_voices_from_api(api_key)
+        if any(voice.endswith(suffix) for voice in voices):
+            return True
+        voices = fetch_voices_from_api(api_key, force_refresh=True, fallback=False)
+        if voices is None:
+            return None
+        return any(voice.endswith(suffix) for voice in voices)
+    
+    @classmethod
+    def lookup(cls, key, api_key):
+        """
+        Find the voice a previous identical clone request created
+        
+        Returns:
+            The registry record, or None if there is none or the voice is gone from the account
+        """
+        with cls._lock:
+            cls._load()
+            entry = cls._entries.get(key)
+        if entry is None:
+            with cls._lock:
+                cls._stats["misses"] += 1
+            return None
+        
+        if time.time() - entry.get("verified_at", 0) >= cls.verify_interval:
+            exists = cls._voice_exists(api_key, entry["voice_id"])
+            if exists is False:
+                print(f"⚠️ Registered clone {entry['name']} ({entry['voice_id']}) is no longer in the account")
+                with cls._lock:
+                    cls._entries.pop(key, None)
+                    cls._stats["stale"] += 1
+                cls._save()
+                return None
+            if exists is None:
+                print(f"⚠️ Could not verify clone {entry['voice_id']} against the voice list, reusing it")
+            else:
+                with cls._lock:
+                    entry["verified_at"] = time.time()
+                cls._save()
+        
+        with cls._lock:
+            cls._stats["hits"] += 1
+        return dict(entry)
+    
+    @classmethod
+    def register(cls, key, api_key, voice_id, name):
+        """Record the voice created for a clone request"""
+        now = time.time()
+        with cls._lock:
+            cls._load()
+            cls._entries[key] = {
+                "voice_id": voice_id,
+                "name": name,
+                "tenant": ElevenLabsCache.tenant_key(api_key),
+                "created_at": now,
+                "verified_at": now,
+            }
+        cls._save()
+    
+    @classmethod
+    def get_stats(cls):
+        """Get registry size and lookup counts"""
+        with cls._lock:
+            cls._load()
+            stats = dict(cls._stats)
+            stats["voices"] = len(cls._entries)
+        return stats